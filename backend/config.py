@@ -1,52 +1,64 @@
 """
 Neon Pi - Configuration Module
 """
-from pydantic_settings import BaseSettings
-from pydantic import Field
-from typing import Optional
+from dataclasses import dataclass, field
+from pathlib import Path
 import os
-from dotenv import load_dotenv
 
-load_dotenv()
+# The repo's .env, wherever the server is started from
+_ENV_FILE = Path(__file__).resolve().parent.parent / ".env"
+if _ENV_FILE.exists():
+    from dotenv import load_dotenv
+    load_dotenv(_ENV_FILE)
 
 
-class Settings(BaseSettings):
+def _env_bool(name: str, default: bool = False) -> bool:
+    """Read a boolean flag from the environment."""
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+@dataclass(frozen=True, slots=True)
+class Settings:
     """Application settings loaded from environment variables."""
-    
+
     # Server
-    host: str = Field(default="0.0.0.0", alias="HOST")
-    port: int = Field(default=8000, alias="PORT")
-    debug: bool = Field(default=False, alias="DEBUG")
-    
+    host: str = os.environ.get("HOST", "0.0.0.0")
+    port: int = int(os.environ.get("PORT", "8000"))
+    debug: bool = _env_bool("DEBUG")
+
     # Google Gemini
-    gemini_api_key: str = Field(default="", alias="GEMINI_API_KEY")
-    
+    gemini_api_key: str = os.environ.get("GEMINI_API_KEY", "")
+
     # ElevenLabs
-    elevenlabs_api_key: str = Field(default="", alias="ELEVENLABS_API_KEY")
-    elevenlabs_voice_id: str = Field(default="21m00Tcm4TlvDq8ikWAM", alias="ELEVENLABS_VOICE_ID")
-    
+    elevenlabs_api_key: str = os.environ.get("ELEVENLABS_API_KEY", "")
+    elevenlabs_voice_id: str = os.environ.get("ELEVENLABS_VOICE_ID", "21m00Tcm4TlvDq8ikWAM")
+
     # Spotify
-    spotify_client_id: str = Field(default="", alias="SPOTIFY_CLIENT_ID")
-    spotify_client_secret: str = Field(default="", alias="SPOTIFY_CLIENT_SECRET")
-    spotify_redirect_uri: str = Field(
-        default="http://localhost:8000/callback/spotify",
-        alias="SPOTIFY_REDIRECT_URI"
+    spotify_client_id: str = os.environ.get("SPOTIFY_CLIENT_ID", "")
+    spotify_client_secret: str = os.environ.get("SPOTIFY_CLIENT_SECRET", "")
+    spotify_redirect_uri: str = os.environ.get(
+        "SPOTIFY_REDIRECT_URI",
+        "http://localhost:8000/callback/spotify"
     )
-    
+
     # Weather
-    openweather_api_key: str = Field(default="", alias="OPENWEATHER_API_KEY")
-    
+    openweather_api_key: str = os.environ.get("OPENWEATHER_API_KEY", "")
+
     # Audio
-    audio_input_device: str = Field(default="default", alias="AUDIO_INPUT_DEVICE")
-    audio_output_device: str = Field(default="default", alias="AUDIO_OUTPUT_DEVICE")
-    
+    audio_input_device: str = os.environ.get("AUDIO_INPUT_DEVICE", "default")
+    audio_output_device: str = os.environ.get("AUDIO_OUTPUT_DEVICE", "default")
+
+    # Speech to text (tiny, base, small, medium)
+    whisper_model: str = os.environ.get("WHISPER_MODEL", "base")
+
+    # Wake word: 80ms audio chunks scored per model call (1-4)
+    wake_word_batch_chunks: int = max(1, min(4, int(os.environ.get("WAKE_WORD_BATCH_CHUNKS", "2"))))
+
     # Paths
-    base_dir: str = Field(default_factory=lambda: os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    
-    class Config:
-        env_file = ".env"
-        env_file_encoding = "utf-8"
-        extra = "ignore"
+    base_dir: str = field(default_factory=lambda: os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 
 settings = Settings()
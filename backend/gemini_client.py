@@ -4,29 +4,14 @@ Handles conversation with Gemini and tool calling.
 """
 from google import genai
 from google.genai import types
-from typing import List, Dict, Any, Optional
+from typing import AsyncIterator, List, Dict, Any, Optional
+from functools import lru_cache
 import json
 from .config import settings
 
 
-class GeminiClient:
-    """Client for Google Gemini AI with function calling support."""
-    
-    def __init__(self):
-        # Initialize the new client
-        self.client = genai.Client(api_key=settings.gemini_api_key)
-        self.model_id = "gemini-2.0-flash"
-        
-        # Define available tools/functions
-        self.tools = self._define_tools()
-        
-        # Conversation history
-        self.history = []
-        self.system_instruction = self._get_system_prompt()
-    
-    def _get_system_prompt(self) -> str:
-        """Get the system prompt for Anton."""
-        return """You are Anton, a helpful and friendly AI voice assistant running on a Raspberry Pi. You are the Son of Anton.
+# System prompt for Anton, shared by every client instance
+_SYSTEM_PROMPT = """You are Anton, a helpful and friendly AI voice assistant running on a Raspberry Pi. You are the Son of Anton.
 
 Your personality:
 - Friendly, warm, and conversational
@@ -44,92 +29,122 @@ Important guidelines:
 - The current date and time are available via the time tool
 
 Remember: Your responses will be spoken aloud via text-to-speech, so be conversational!"""
-    
-    def _define_tools(self) -> List[types.Tool]:
-        """Define the available tools for function calling."""
-        # Define function declarations
-        play_music = types.FunctionDeclaration(
-            name="play_music",
-            description="Play music. Can play a specific song, artist, album, or playlist.",
-            parameters=types.Schema(
-                type=types.Type.OBJECT,
-                properties={
-                    "query": types.Schema(
-                        type=types.Type.STRING,
-                        description="What to play - song name, artist, album, or playlist name"
-                    ),
-                    "type": types.Schema(
-                        type=types.Type.STRING,
-                        description="Type of content: track, artist, album, playlist"
-                    )
-                },
-                required=["query"]
-            )
+
+
+def _build_tools() -> List[types.Tool]:
+    """Define the available tools for function calling."""
+    # Define function declarations
+    play_music = types.FunctionDeclaration(
+        name="play_music",
+        description="Play music. Can play a specific song, artist, album, or playlist.",
+        parameters=types.Schema(
+            type=types.Type.OBJECT,
+            properties={
+                "query": types.Schema(
+                    type=types.Type.STRING,
+                    description="What to play - song name, artist, album, or playlist name"
+                ),
+                "type": types.Schema(
+                    type=types.Type.STRING,
+                    description="Type of content: track, artist, album, playlist"
+                )
+            },
+            required=["query"]
         )
-        
-        pause_music = types.FunctionDeclaration(
-            name="pause_music",
-            description="Pause the currently playing music"
+    )
+
+    pause_music = types.FunctionDeclaration(
+        name="pause_music",
+        description="Pause the currently playing music"
+    )
+
+    skip_track = types.FunctionDeclaration(
+        name="skip_track",
+        description="Skip to the next track"
+    )
+
+    now_playing = types.FunctionDeclaration(
+        name="now_playing",
+        description="Get information about the currently playing track"
+    )
+
+    get_weather = types.FunctionDeclaration(
+        name="get_weather",
+        description="Get the current weather for a location",
+        parameters=types.Schema(
+            type=types.Type.OBJECT,
+            properties={
+                "location": types.Schema(
+                    type=types.Type.STRING,
+                    description="City name or location"
+                )
+            },
+            required=["location"]
         )
-        
-        skip_track = types.FunctionDeclaration(
-            name="skip_track",
-            description="Skip to the next track"
+    )
+
+    get_current_time = types.FunctionDeclaration(
+        name="get_current_time",
+        description="Get the current date and time",
+        parameters=types.Schema(
+            type=types.Type.OBJECT,
+            properties={
+                "timezone": types.Schema(
+                    type=types.Type.STRING,
+                    description="Timezone like 'America/New_York' (optional)"
+                )
+            }
         )
-        
-        now_playing = types.FunctionDeclaration(
-            name="now_playing",
-            description="Get information about the currently playing track"
+    )
+
+    fetch_web_content = types.FunctionDeclaration(
+        name="fetch_web_content",
+        description="Fetch and read content from a URL (Reddit threads, articles, etc.)",
+        parameters=types.Schema(
+            type=types.Type.OBJECT,
+            properties={
+                "url": types.Schema(
+                    type=types.Type.STRING,
+                    description="The URL to fetch content from"
+                )
+            },
+            required=["url"]
         )
+    )
+
+    return [types.Tool(function_declarations=[
+        play_music, pause_music, skip_track, now_playing,
+        get_weather, get_current_time, fetch_web_content
+    ])]
+
+
+# Tool declarations are static, so build them once at import time
+_TOOLS = _build_tools()
+
+
+class GeminiClient:
+    """Client for Google Gemini AI with function calling support."""
+    
+    # Number of conversation turns kept in history (each turn is ~2 entries)
+    MAX_TURNS = 16
+    
+    def __init__(self):
+        # Initialize the new client
+        self.client = genai.Client(api_key=settings.gemini_api_key)
+        self.model_id = "gemini-2.0-flash"
         
-        get_weather = types.FunctionDeclaration(
-            name="get_weather",
-            description="Get the current weather for a location",
-            parameters=types.Schema(
-                type=types.Type.OBJECT,
-                properties={
-                    "location": types.Schema(
-                        type=types.Type.STRING,
-                        description="City name or location"
-                    )
-                },
-                required=["location"]
-            )
-        )
+        # Available tools/functions
+        self.tools = _TOOLS
         
-        get_current_time = types.FunctionDeclaration(
-            name="get_current_time",
-            description="Get the current date and time",
-            parameters=types.Schema(
-                type=types.Type.OBJECT,
-                properties={
-                    "timezone": types.Schema(
-                        type=types.Type.STRING,
-                        description="Timezone like 'America/New_York' (optional)"
-                    )
-                }
-            )
-        )
+        # Conversation history
+        self.history = []
+        self.system_instruction = _SYSTEM_PROMPT
         
-        fetch_web_content = types.FunctionDeclaration(
-            name="fetch_web_content",
-            description="Fetch and read content from a URL (Reddit threads, articles, etc.)",
-            parameters=types.Schema(
-                type=types.Type.OBJECT,
-                properties={
-                    "url": types.Schema(
-                        type=types.Type.STRING,
-                        description="The URL to fetch content from"
-                    )
-                },
-                required=["url"]
-            )
+        # Request config doesn't change between turns
+        self._config = types.GenerateContentConfig(
+            system_instruction=self.system_instruction,
+            tools=self.tools
         )
-        
-        return [types.Tool(function_declarations=[
-            play_music, pause_music, skip_track, now_playing,
-            get_weather, get_current_time, fetch_web_content
-        ])]
     
     async def process_message(
         self,
@@ -154,63 +169,49 @@ Remember: Your responses will be spoken aloud via text-to-speech, so be conversa
             ))
             
             # Generate response
-            response = self.client.models.generate_content(
+            response = await self.client.aio.models.generate_content(
                 model=self.model_id,
                 contents=self.history,
-                config=types.GenerateContentConfig(
-                    system_instruction=self.system_instruction,
-                    tools=self.tools
-                )
+                config=self._config
             )
             
+            # Fast path: a single text part means no function calls to handle
+            parts = self._response_parts(response)
+            if len(parts) == 1 and parts[0].text:
+                response_text = parts[0].text
+                self.history.append(types.Content(
+                    role="model",
+                    parts=[types.Part.from_text(text=response_text)]
+                ))
+                self._trim_history()
+                return response_text.strip()
+            
             # Check for function calls
-            if response.candidates and response.candidates[0].content.parts:
-                for part in response.candidates[0].content.parts:
-                    if part.function_call:
-                        fn_call = part.function_call
-                        fn_name = fn_call.name
-                        fn_args = dict(fn_call.args) if fn_call.args else {}
-                        
+            for part in parts:
+                if part.function_call:
+                    fn_call = part.function_call
+                    fn_name = fn_call.name
+                    fn_args = fn_call.args or {}
+                    
+                    if settings.debug:
                         print(f"[Gemini] Function call: {fn_name}({fn_args})")
+                    
+                    # Execute the tool if executor provided
+                    if tool_executor:
+                        result = await tool_executor(fn_name, fn_args)
+                        self._add_function_call(fn_name, fn_args, result)
                         
-                        # Execute the tool if executor provided
-                        if tool_executor:
-                            result = await tool_executor(fn_name, fn_args)
-                            
-                            # Add function call to history
-                            self.history.append(types.Content(
-                                role="model",
-                                parts=[types.Part.from_function_call(
-                                    name=fn_name,
-                                    args=fn_args
-                                )]
-                            ))
-                            
-                            # Add function response to history
-                            self.history.append(types.Content(
-                                role="user",
-                                parts=[types.Part.from_function_response(
-                                    name=fn_name,
-                                    response={"result": result}
-                                )]
-                            ))
-                            
-                            # Get final response
-                            response = self.client.models.generate_content(
-                                model=self.model_id,
-                                contents=self.history,
-                                config=types.GenerateContentConfig(
-                                    system_instruction=self.system_instruction,
-                                    tools=self.tools
-                                )
-                            )
+                        # Get final response
+                        response = await self.client.aio.models.generate_content(
+                            model=self.model_id,
+                            contents=self.history,
+                            config=self._config
+                        )
             
             # Extract the final text response
-            response_text = ""
-            if response.candidates and response.candidates[0].content.parts:
-                for part in response.candidates[0].content.parts:
-                    if part.text:
-                        response_text += part.text
+            response_text = "".join(
+                part.text for part in self._response_parts(response) if part.text
+            )
             
             # Add assistant response to history
             if response_text:
@@ -219,16 +220,147 @@ Remember: Your responses will be spoken aloud via text-to-speech, so be conversa
                     parts=[types.Part.from_text(text=response_text)]
                 ))
             
+            self._trim_history()
+            
             return response_text.strip() or "I'm not sure how to respond to that."
             
         except Exception as e:
             print(f"[Gemini] Error processing message: {e}")
             return "I'm sorry, I had trouble processing that. Could you try again?"
     
+    async def stream_message(
+        self,
+        user_message: str,
+        tool_executor: Optional[callable] = None
+    ) -> AsyncIterator[str]:
+        """
+        Process a user message and stream the AI response as it arrives.
+        
+        Args:
+            user_message: The transcribed user speech
+            tool_executor: Async function to execute tool calls
+            
+        Yields:
+            Pieces of the AI response text
+        """
+        text_parts = []
+        try:
+            # Add user message to history
+            self.history.append(types.Content(
+                role="user",
+                parts=[types.Part.from_text(text=user_message)]
+            ))
+            
+            # Stream the first response, collecting any function calls
+            function_calls = []
+            stream = await self.client.aio.models.generate_content_stream(
+                model=self.model_id,
+                contents=self.history,
+                config=self._config
+            )
+            async for chunk in stream:
+                for part in self._response_parts(chunk):
+                    if part.function_call:
+                        function_calls.append(part.function_call)
+                    elif part.text:
+                        text_parts.append(part.text)
+                        yield part.text
+            
+            if function_calls and tool_executor:
+                for fn_call in function_calls:
+                    fn_name = fn_call.name
+                    fn_args = fn_call.args or {}
+                    
+                    if settings.debug:
+                        print(f"[Gemini] Function call: {fn_name}({fn_args})")
+                    
+                    result = await tool_executor(fn_name, fn_args)
+                    self._add_function_call(fn_name, fn_args, result)
+                
+                # Stream the final response
+                stream = await self.client.aio.models.generate_content_stream(
+                    model=self.model_id,
+                    contents=self.history,
+                    config=self._config
+                )
+                async for chunk in stream:
+                    for part in self._response_parts(chunk):
+                        if part.text:
+                            text_parts.append(part.text)
+                            yield part.text
+            
+            # Add assistant response to history
+            response_text = "".join(text_parts)
+            if response_text:
+                self.history.append(types.Content(
+                    role="model",
+                    parts=[types.Part.from_text(text=response_text)]
+                ))
+            
+            self._trim_history()
+            
+            if not response_text.strip():
+                yield "I'm not sure how to respond to that."
+            
+        except Exception as e:
+            print(f"[Gemini] Error streaming message: {e}")
+            if not text_parts:
+                yield "I'm sorry, I had trouble processing that. Could you try again?"
+    
+    @staticmethod
+    def _response_parts(response) -> list:
+        """Get the content parts of a response or streamed chunk."""
+        if response.candidates and response.candidates[0].content and response.candidates[0].content.parts:
+            return response.candidates[0].content.parts
+        return []
+    
+    def _add_function_call(self, fn_name: str, fn_args: Dict[str, Any], result: Any):
+        """Record a function call and its result in the history."""
+        # Add function call to history
+        self.history.append(types.Content(
+            role="model",
+            parts=[types.Part.from_function_call(
+                name=fn_name,
+                args=fn_args
+            )]
+        ))
+        
+        # Add function response to history
+        self.history.append(types.Content(
+            role="user",
+            parts=[types.Part.from_function_response(
+                name=fn_name,
+                response={"result": result}
+            )]
+        ))
+    
+    def _trim_history(self):
+        """Keep only the most recent turns so each request stays bounded."""
+        limit = self.MAX_TURNS * 2
+        if len(self.history) <= limit:
+            return
+        
+        history = self.history[-limit:]
+        
+        # Gemini expects the conversation to open with a plain user message,
+        # so drop any leading model reply or orphaned function call/response
+        start = 0
+        while start < len(history):
+            content = history[start]
+            if content.role == "user" and not any(
+                part.function_response for part in content.parts or []
+            ):
+                break
+            start += 1
+        
+        self.history = history[start:]
+    
     def reset_conversation(self):
         """Reset the conversation history."""
         self.history = []
 
 
-# Global instance
-gemini_client = GeminiClient()
+@lru_cache(maxsize=1)
+def get_gemini_client() -> GeminiClient:
+    """Get the shared Gemini client, creating it on first use."""
+    return GeminiClient()
@@ -0,0 +1,17 @@
+"""
+Neon Pi - Shared HTTP Client
+One pooled HTTP/2 client for all outgoing requests (Spotify, weather, web pages),
+so TLS sessions and connections are reused across subsystems.
+"""
+import httpx
+from aiolimiter import AsyncLimiter
+
+
+shared_client = httpx.AsyncClient(
+    http2=True,
+    limits=httpx.Limits(max_keepalive_connections=16, max_connections=32),
+    timeout=10.0
+)
+
+# Spotify Web API calls are limited to 10 requests per second
+spotify_limiter = AsyncLimiter(10, 1)
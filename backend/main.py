@@ -5,24 +5,18 @@ The main entry point for the Neon voice assistant.
 import asyncio
 import os
 import sys
+import time
 from pathlib import Path
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Request
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
+import orjson
 import uvicorn
 
 from .config import settings
 from .websocket_manager import manager
-from .gemini_client import gemini_client
-from .spotify_client import spotify_client
-from .youtube_music_client import youtube_music_client
-from .music_manager import music_manager
-from .tts import tts_engine
-from .speech_to_text import stt_engine
-from .wake_word import WakeWordDetector
-from .tools import tool_executor
 
 
 # Application state
@@ -32,128 +26,318 @@ class AppState:
         self.is_listening = False
         self.is_processing = False
         self.is_speaking = False
-        self.wake_detector: WakeWordDetector = None
+        self.is_ready = False
+        self.init_errors = {}  # Subsystem name -> load error
+        self.wake_detector = None
         self.music_polling_task = None
+        self.init_task = None
+        self.lock = asyncio.Lock()
 
 
 state = AppState()
 
+# Music polling intervals (seconds)
+MUSIC_POLL_INTERVAL = 2  # While something is playing
+MUSIC_POLL_MAX_INTERVAL = 30  # Back-off cap while paused or disconnected
+MUSIC_POLL_IDLE_INTERVAL = 5  # While no clients are connected
+
+# How long /api/status responses are reused (seconds)
+STATUS_CACHE_TTL = 0.5
+_status_cache = (0.0, None)
+
+
+async def send_audio_level(level: float):
+    """Forward a microphone level to the UI (rate-limited by the recorder)."""
+    await manager.send_state_update("listening", {"level": level})
+
+
+async def mark_speaking():
+    """Switch the UI to the speaking state once per response."""
+    if not state.is_speaking:
+        state.is_speaking = True
+        await manager.send_state_update("speaking")
+
+
+async def stream_speech(tokens: asyncio.Queue) -> bool:
+    """
+    Speak response text while it's still streaming in from Gemini.
+    
+    Args:
+        tokens: Queue of text deltas, ended with None
+        
+    Returns:
+        Whether any audio was sent
+    """
+    async def token_iter():
+        while (token := await tokens.get()) is not None:
+            yield token
+    
+    sent_audio = False
+    async for frame in app.state.tts.speak_stream(token_iter()):
+        await mark_speaking()
+        # Raw MessagePack bin, the UI schedules frames back to back
+        await manager.broadcast({
+            "type": "audio_pcm",
+            "data": frame,
+            "sample_rate": 16000
+        })
+        sent_audio = True
+    return sent_audio
+
+
+async def speak_text(text: str):
+    """Speak a complete response as one MP3 clip."""
+    await mark_speaking()
+    audio = await app.state.tts.speak(text)
+    if audio:
+        # Send audio to frontend for playback as raw MessagePack bin, no base64
+        await manager.broadcast({
+            "type": "audio",
+            "data": audio
+        })
+
 
 async def on_wake_word_detected():
     """Callback when wake word is detected."""
-    if state.is_processing or state.is_speaking:
+    # Ignore wake events while a previous one is still being handled
+    if not state.is_ready or state.lock.locked():
         return
     
-    print("[Anton] Wake word detected!")
-    state.is_listening = True
-    
-    # Notify UI
-    await manager.send_state_update("listening")
+    missing = [
+        name for name in ("stt", "gemini", "tts", "tools")
+        if getattr(app.state, name) is None
+    ]
+    if missing:
+        await manager.send_error(f"Voice pipeline unavailable, failed to load: {', '.join(missing)}")
+        return
     
-    try:
-        # Record and transcribe
-        state.is_processing = True
-        await manager.send_state_update("processing")
+    async with state.lock:
+        print("[Anton] Wake word detected!")
+        state.is_listening = True
         
-        # Listen for user speech
-        transcript = await stt_engine.listen_and_transcribe(
-            duration=10.0,
-            on_audio_level=lambda level: manager.send_state_update(
-                "listening", {"level": level}
-            )
-        )
+        # Notify UI
+        await manager.send_state_update("listening")
         
-        if not transcript:
-            await manager.send_state_update("idle")
+        try:
+            # Record and transcribe
+            state.is_processing = True
+            await manager.send_state_update("processing")
+            
+            # Listen for user speech
+            transcript = await app.state.stt.listen_and_transcribe(
+                duration=10.0,
+                on_audio_level=send_audio_level
+            )
+            
+            if not transcript:
+                await manager.send_state_update("idle")
+                state.is_processing = False
+                return
+            
+            # Send transcript to UI
+            await manager.send_transcript(transcript, is_final=True)
+            
+            # Process with Gemini, feeding its text into TTS as it streams
+            await manager.send_state_update("thinking")
+            tokens: asyncio.Queue = asyncio.Queue()
+            speaker = asyncio.create_task(stream_speech(tokens))
+            response_parts = []
+            try:
+                async for delta in app.state.gemini.stream_message(
+                    transcript,
+                    tool_executor=app.state.tools.execute
+                ):
+                    response_parts.append(delta)
+                    tokens.put_nowait(delta)
+                    await manager.send_response("".join(response_parts).strip())
+            finally:
+                tokens.put_nowait(None)
+                sent_audio = await speaker
+            
+            # Streaming TTS failed before producing audio, fall back to one clip
+            response = "".join(response_parts).strip()
+            if not sent_audio and response:
+                await speak_text(response)
+            
+        except Exception as e:
+            print(f"[Anton] Error in wake word handler: {e}")
+            await manager.send_error(str(e))
+        finally:
+            state.is_listening = False
             state.is_processing = False
-            return
-        
-        # Send transcript to UI
-        await manager.send_transcript(transcript, is_final=True)
-        
-        # Process with Gemini
-        await manager.send_state_update("thinking")
-        response = await gemini_client.process_message(
-            transcript,
-            tool_executor=tool_executor.execute
-        )
-        
-        # Send response to UI
-        await manager.send_response(response)
-        
-        # Speak the response
-        state.is_speaking = True
-        await manager.send_state_update("speaking")
-        
-        audio = await tts_engine.speak(response)
-        if audio:
-            # Send audio to frontend for playback
-            await manager.broadcast({
-                "type": "audio",
-                "data": audio.hex()  # Send as hex string
-            })
-        
-    except Exception as e:
-        print(f"[Anton] Error in wake word handler: {e}")
-        await manager.send_error(str(e))
-    finally:
-        state.is_listening = False
-        state.is_processing = False
-        state.is_speaking = False
-        await manager.send_state_update("idle")
+            state.is_speaking = False
+            await manager.send_state_update("idle")
 
 
 async def music_polling_loop():
     """Poll music services for now playing updates."""
+    music_manager = app.state.music
+    
+    async def wait(interval: float) -> float:
+        """Sleep for interval, unless a playback command or new login cuts the back-off short."""
+        try:
+            await asyncio.wait_for(music_manager.playback_changed.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            return interval
+        music_manager.playback_changed.clear()
+        return MUSIC_POLL_INTERVAL
+    
+    interval = MUSIC_POLL_INTERVAL
     while True:
+        # Nobody to show updates to
+        if not manager.active_connections:
+            await asyncio.sleep(MUSIC_POLL_IDLE_INTERVAL)
+            continue
+        
+        # No music service connected yet, back off
+        if music_manager.active_service == "none":
+            interval = await wait(min(interval * 2, MUSIC_POLL_MAX_INTERVAL))
+            continue
+        
         try:
             now_playing = await music_manager.get_now_playing()
             if now_playing:
                 await manager.send_spotify_update(now_playing)
+            
+            # Poll quickly while playing, back off while paused or stopped
+            if now_playing and now_playing.get("is_playing"):
+                interval = MUSIC_POLL_INTERVAL
+            else:
+                interval = min(interval * 2, MUSIC_POLL_MAX_INTERVAL)
         except Exception as e:
             print(f"[Music] Polling error: {e}")
         
-        await asyncio.sleep(2)  # Poll every 2 seconds
+        interval = await wait(interval)
 
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    """Application lifespan handler."""
-    print("[Anton] Starting up...")
-    
+def _load_gemini():
+    from .gemini_client import get_gemini_client
+    return get_gemini_client()
+
+
+def _load_spotify():
+    from .spotify_client import spotify_client
     # Try to load cached Spotify token
     spotify_client.load_cached_token()
-    
+    return spotify_client
+
+
+def _load_youtube_music():
+    from .youtube_music_client import youtube_music_client
     # Try to load YouTube Music auth
     youtube_music_client.load_auth()
-    
-    # Start music polling
-    state.music_polling_task = asyncio.create_task(music_polling_loop())
-    
-    # Initialize wake word detector
-    state.wake_detector = WakeWordDetector(
+    return youtube_music_client
+
+
+def _load_music():
+    from .music_manager import music_manager
+    return music_manager
+
+
+def _load_tts():
+    from .tts import tts_engine
+    return tts_engine
+
+
+def _load_stt():
+    from .speech_to_text import stt_engine
+    return stt_engine
+
+
+def _load_tools():
+    from .tools import tool_executor
+    return tool_executor
+
+
+def _load_wake_detector():
+    from .wake_word import WakeWordDetector
+    return WakeWordDetector(
         wake_word="hey_jarvis",  # Temporary until we train "hey_neon"
         sensitivity=0.5,
-        on_wake=on_wake_word_detected
+        on_wake=on_wake_word_detected,
+        batch_chunks=settings.wake_word_batch_chunks
     )
+
+
+def _load_subsystem(name: str, loader):
+    """Run one subsystem loader, recording the error instead of raising."""
+    try:
+        return loader()
+    except Exception as e:
+        print(f"[Anton] Failed to load {name}: {e}")
+        state.init_errors[name] = str(e)
+        return None
+
+
+def load_subsystems():
+    """
+    Import the heavy subsystems (AI, music, audio). Runs in a worker thread.
+    
+    Each subsystem loads on its own, so e.g. a missing Gemini key doesn't
+    also take down music control and the wake word.
+    """
+    app.state.gemini = _load_subsystem("gemini", _load_gemini)
+    app.state.spotify = _load_subsystem("spotify", _load_spotify)
+    app.state.youtube_music = _load_subsystem("youtube_music", _load_youtube_music)
+    app.state.music = _load_subsystem("music", _load_music)
+    app.state.tts = _load_subsystem("tts", _load_tts)
+    app.state.stt = _load_subsystem("stt", _load_stt)
+    app.state.tools = _load_subsystem("tools", _load_tools)
+    
+    # Initialize wake word detector
+    state.wake_detector = _load_subsystem("wake_word", _load_wake_detector)
+
+
+async def init_subsystems():
+    """Load subsystems in the background so the server can start serving right away."""
+    try:
+        await asyncio.to_thread(load_subsystems)
+    except Exception as e:
+        print(f"[Anton] Startup error: {e}")
+        state.init_errors["startup"] = str(e)
+        return
+    
+    # Start music polling
+    if app.state.music is not None:
+        state.music_polling_task = asyncio.create_task(music_polling_loop())
+    state.is_ready = True
+    
+    if state.init_errors:
+        print(f"[Anton] Started without: {', '.join(state.init_errors)}")
     
     # Note: Wake word detection will be started by the client
     # after the user grants microphone permission
     
     print("[Anton] Ready! Say 'Hey Jarvis' to activate (Hey Neon coming soon)")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application lifespan handler."""
+    print("[Anton] Starting up...")
+    
+    # Cache the UI page so it isn't read from disk on every request
+    app.state.index_html = INDEX_HTML.read_bytes() if _INDEX_EXISTS else None
+    
+    state.init_task = asyncio.create_task(init_subsystems())
     
     yield
     
     # Shutdown
     print("[Anton] Shutting down...")
     
+    if state.init_task:
+        state.init_task.cancel()
+    
     if state.music_polling_task:
         state.music_polling_task.cancel()
     
     if state.wake_detector:
         state.wake_detector.stop()
     
-    await tool_executor.close()
+    if state.is_ready:
+        from .http import shared_client
+        await shared_client.aclose()
 
 
 # Create FastAPI app
@@ -165,11 +349,14 @@ app = FastAPI(
 )
 
 # Determine frontend path
-FRONTEND_PATH = Path(__file__).parent.parent / "frontend"
+FRONTEND_PATH = (Path(__file__).parent.parent / "frontend").resolve()
+INDEX_HTML = FRONTEND_PATH / "index.html"
+_HAS_FRONTEND = FRONTEND_PATH.is_dir()
+_INDEX_EXISTS = INDEX_HTML.is_file()
 
 
 # Mount static files
-if FRONTEND_PATH.exists():
+if _HAS_FRONTEND:
     app.mount("/static", StaticFiles(directory=str(FRONTEND_PATH)), name="static")
 
 
@@ -178,30 +365,50 @@ if FRONTEND_PATH.exists():
 @app.get("/", response_class=HTMLResponse)
 async def root():
     """Serve the main UI."""
-    index_path = FRONTEND_PATH / "index.html"
-    if index_path.exists():
-        return HTMLResponse(content=index_path.read_text())
+    if app.state.index_html is not None:
+        return HTMLResponse(content=app.state.index_html)
     return HTMLResponse(content="<h1>Neon Pi</h1><p>Frontend not found</p>")
 
 
 @app.get("/api/status")
 async def get_status():
     """Get current system status."""
-    return {
-        "music_services": music_manager.get_status(),
-        "spotify_connected": spotify_client.is_authenticated(),
-        "youtube_music_connected": youtube_music_client.is_authenticated(),
+    global _status_cache
+    if not state.is_ready:
+        if state.init_errors:
+            return {"status": "error", "errors": state.init_errors}
+        return {"status": "initializing"}
+    
+    now = time.monotonic()
+    if now - _status_cache[0] < STATUS_CACHE_TTL:
+        return _status_cache[1]
+    
+    status = {
+        "status": "degraded" if state.init_errors else "ready",
+        "errors": state.init_errors,
+        "music_services": app.state.music.get_status() if app.state.music else None,
+        "spotify_connected": bool(app.state.spotify and app.state.spotify.is_authenticated()),
+        "youtube_music_connected": bool(
+            app.state.youtube_music and app.state.youtube_music.is_authenticated()
+        ),
         "wake_word_active": state.wake_detector.is_running() if state.wake_detector else False,
         "is_listening": state.is_listening,
         "is_processing": state.is_processing,
         "is_speaking": state.is_speaking
     }
+    _status_cache = (now, status)
+    return status
 
 
 @app.get("/api/spotify/auth")
 async def spotify_auth():
     """Start Spotify OAuth flow."""
-    auth_url = spotify_client.get_auth_url()
+    if not state.is_ready:
+        return JSONResponse({"error": "Still starting up"}, status_code=503)
+    if app.state.spotify is None:
+        return JSONResponse({"error": "Spotify failed to load"}, status_code=503)
+    
+    auth_url = app.state.spotify.get_auth_url()
     return {"auth_url": auth_url}
 
 
@@ -211,9 +418,11 @@ async def spotify_callback(code: str = None, error: str = None):
     if error:
         return HTMLResponse(f"<h1>Error</h1><p>{error}</p>")
     
-    if code:
-        success = spotify_client.authenticate_with_code(code)
+    if code and state.is_ready and app.state.spotify is not None:
+        success = app.state.spotify.authenticate_with_code(code)
         if success:
+            if app.state.music is not None:
+                app.state.music.playback_changed.set()
             return HTMLResponse("""
                 <h1>Spotify Connected!</h1>
                 <p>You can close this tab and return to Neon.</p>
@@ -226,6 +435,8 @@ async def spotify_callback(code: str = None, error: str = None):
 @app.post("/api/wake/start")
 async def start_wake_detection():
     """Start wake word detection."""
+    global _status_cache
+    _status_cache = (0.0, None)
     if state.wake_detector:
         state.wake_detector.start()
         return {"status": "started"}
@@ -235,6 +446,8 @@ async def start_wake_detection():
 @app.post("/api/wake/stop")
 async def stop_wake_detection():
     """Stop wake word detection."""
+    global _status_cache
+    _status_cache = (0.0, None)
     if state.wake_detector:
         state.wake_detector.stop()
         return {"status": "stopped"}
@@ -250,12 +463,17 @@ async def send_message(request: Request):
     if not message:
         return JSONResponse({"error": "No message provided"}, status_code=400)
     
+    if not state.is_ready:
+        return JSONResponse({"error": "Still starting up"}, status_code=503)
+    if app.state.gemini is None or app.state.tools is None:
+        return JSONResponse({"error": "Assistant failed to load", "errors": state.init_errors}, status_code=503)
+    
     try:
         await manager.send_state_update("thinking")
         
-        response = await gemini_client.process_message(
+        response = await app.state.gemini.process_message(
             message,
-            tool_executor=tool_executor.execute
+            tool_executor=app.state.tools.execute
         )
         
         await manager.send_response(response)
@@ -275,11 +493,13 @@ async def websocket_endpoint(websocket: WebSocket):
         # Send initial status
         await manager.send_personal(websocket, {
             "type": "connected",
-            "spotify_authenticated": spotify_client.is_authenticated()
+            "spotify_authenticated": bool(
+                state.is_ready and app.state.spotify and app.state.spotify.is_authenticated()
+            )
         })
         
         while True:
-            data = await websocket.receive_json()
+            data = orjson.loads(await websocket.receive_text())
             
             # Handle client messages
             if data.get("type") == "ping":
@@ -300,11 +520,20 @@ async def websocket_endpoint(websocket: WebSocket):
 
 def main():
     """Run the Neon Pi server."""
+    # uvloop has much lower per-task overhead than the default asyncio loop
+    try:
+        import uvloop  # noqa: F401
+        loop = "uvloop"
+    except ImportError:
+        loop = "asyncio"
+    
     uvicorn.run(
         "backend.main:app",
         host=settings.host,
         port=settings.port,
-        reload=settings.debug
+        reload=settings.debug,
+        loop=loop,
+        ws_per_message_deflate=True
     )
 
 
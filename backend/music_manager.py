@@ -2,6 +2,7 @@
 Son of Anton - Music Service Manager
 Handles switching between Spotify and YouTube Music.
 """
+import asyncio
 from typing import Optional, Dict, Any
 from .spotify_client import spotify_client
 from .youtube_music_client import youtube_music_client
@@ -15,6 +16,8 @@ class MusicManager:
     
     def __init__(self):
         self._preferred_service = "spotify"  # or "youtube_music"
+        # Set after playback commands so the now playing poller refreshes right away
+        self.playback_changed = asyncio.Event()
     
     @property
     def active_service(self) -> str:
@@ -28,24 +31,37 @@ class MusicManager:
     
     def get_status(self) -> Dict[str, Any]:
         """Get status of all music services."""
+        spot_auth = spotify_client.is_authenticated()
+        ytm_auth = youtube_music_client.is_authenticated()
+        
+        if spot_auth:
+            active = "spotify"
+        elif ytm_auth:
+            active = "youtube_music"
+        else:
+            active = "none"
+        
         return {
             "spotify": {
-                "connected": spotify_client.is_authenticated(),
+                "connected": spot_auth,
                 "available": True
             },
             "youtube_music": {
-                "connected": youtube_music_client.is_authenticated(),
+                "connected": ytm_auth,
                 "available": youtube_music_client.is_available()
             },
-            "active": self.active_service
+            "active": active
         }
     
     async def play(self, query: str, content_type: str = "track") -> str:
         """Play music using the active service."""
         if spotify_client.is_authenticated():
-            return await spotify_client.play(query, content_type)
+            result = await spotify_client.play(query, content_type)
+            self.playback_changed.set()
+            return result
         elif youtube_music_client.is_authenticated() or youtube_music_client.is_available():
             result = await youtube_music_client.play(query)
+            self.playback_changed.set()
             if result.get("success"):
                 return result.get("message", "Playing...")
             return result.get("error", "Couldn't play that")
@@ -55,28 +71,36 @@ class MusicManager:
     async def pause(self) -> str:
         """Pause playback."""
         if spotify_client.is_authenticated():
-            return await spotify_client.pause()
+            result = await spotify_client.pause()
+            self.playback_changed.set()
+            return result
         else:
             return "Pause not available for YouTube Music (use your device)"
     
     async def resume(self) -> str:
         """Resume playback."""
         if spotify_client.is_authenticated():
-            return await spotify_client.resume()
+            result = await spotify_client.resume()
+            self.playback_changed.set()
+            return result
         else:
             return "Resume not available for YouTube Music (use your device)"
     
     async def skip(self) -> str:
         """Skip to next track."""
         if spotify_client.is_authenticated():
-            return await spotify_client.skip()
+            result = await spotify_client.skip()
+            self.playback_changed.set()
+            return result
         else:
             return "Skip not available for YouTube Music (use your device)"
     
     async def previous(self) -> str:
         """Go to previous track."""
         if spotify_client.is_authenticated():
-            return await spotify_client.previous()
+            result = await spotify_client.previous()
+            self.playback_changed.set()
+            return result
         else:
             return "Previous not available for YouTube Music (use your device)"
     
@@ -100,9 +124,17 @@ class MusicManager:
     
     async def search(self, query: str) -> str:
         """Search for music and describe results."""
+        searches = []
+        if spotify_client.is_authenticated():
+            searches.append(spotify_client.get_track_info(query))
         if youtube_music_client.is_available():
-            info = await youtube_music_client.get_song_info(query)
-            if info:
+            searches.append(youtube_music_client.get_song_info(query))
+        
+        # Query both services at once, preferring Spotify's result
+        for info in await asyncio.gather(*searches, return_exceptions=True):
+            if isinstance(info, Exception):
+                print(f"[Music] Search error: {info}")
+            elif info:
                 return f"Found '{info['title']}' by {info['artist']}"
         return f"Couldn't find: {query}"
 
@@ -11,6 +11,19 @@ from typing import Optional, Tuple
 import threading
 import queue
 
+from .config import settings
+
+try:
+    import sounddevice as sd
+    _HAS_SD = True
+except (ImportError, OSError):
+    sd = None
+    _HAS_SD = False
+
+
+# Minimum seconds between audio level callbacks
+LEVEL_UPDATE_INTERVAL = 0.1
+
 
 class SpeechToText:
     """
@@ -18,18 +31,26 @@ class SpeechToText:
     Optimized for Raspberry Pi with smaller models.
     """
     
-    def __init__(self, model_size: str = "base"):
+    # Sizes that have an English-only (".en") variant
+    ENGLISH_MODELS = ("tiny", "base", "small", "medium")
+    
+    def __init__(self, model_size: str = "base", english_only: bool = True):
         """
         Initialize STT engine.
         
         Args:
             model_size: Whisper model size (tiny, base, small, medium)
-                       - tiny: Fastest, less accurate
+                       - tiny: Fastest, less accurate (sub-second on Pi 4)
                        - base: Good balance for Pi 4
                        - small: Better accuracy, slower
+            english_only: Use the smaller, faster ".en" variant of the model.
+                       Transcription is always English, so this is the default.
         """
+        if english_only and model_size in self.ENGLISH_MODELS:
+            model_size = f"{model_size}.en"
         self.model_size = model_size
         self._model = None
+        self._pipeline = None
         self._recording = False
         self._audio_frames = []
         self._sample_rate = 16000
@@ -40,7 +61,7 @@ class SpeechToText:
             return
         
         try:
-            from faster_whisper import WhisperModel
+            from faster_whisper import WhisperModel, BatchedInferencePipeline
             
             print(f"[STT] Loading Whisper model: {self.model_size}...")
             
@@ -48,8 +69,11 @@ class SpeechToText:
             self._model = WhisperModel(
                 self.model_size,
                 device="cpu",  # Change to "cuda" if GPU available
-                compute_type="int8"  # Optimized for CPU
+                compute_type="int8",  # Optimized for CPU
+                cpu_threads=os.cpu_count() or 4,  # Use every core
+                num_workers=1
             )
+            self._pipeline = BatchedInferencePipeline(model=self._model)
             
             print("[STT] Model loaded successfully")
             
@@ -77,61 +101,109 @@ class SpeechToText:
         Returns:
             Audio data as numpy array
         """
+        if not _HAS_SD:
+            print("[STT] sounddevice not available, can't record audio")
+            return np.array([])
+        
         try:
-            import sounddevice as sd
-            
             print("[STT] Recording...")
             
-            frames = []
+            block_size = 1024
+            
+            # Preallocate one contiguous buffer for the whole recording
+            # (plus slack for timer jitter); the callback fills it in place
+            max_samples = int(duration * self._sample_rate) + 8 * block_size
+            buf = np.empty(max_samples, dtype=np.float32)
+            written = 0
+            
             silence_frames = 0
-            max_silence_frames = int(silence_duration * self._sample_rate / 1024)
+            max_silence_frames = int(silence_duration * self._sample_rate / block_size)
+            min_samples = self._sample_rate  # Record at least ~1s
+            
+            # Samples are float32 in [-1, 1]; the threshold is given on the
+            # int16 scale, so compare mean power against its squared equivalent
+            threshold_sq = (silence_threshold / 32768.0) ** 2
+            
+            # The stream callback runs on PortAudio's thread, so levels are
+            # handed to the event loop and forwarded from there
+            loop = asyncio.get_running_loop()
+            level_ready = asyncio.Event()
+            current_level = 0.0
+            
+            def push_level(level: float):
+                nonlocal current_level
+                current_level = level
+                level_ready.set()
+            
+            async def forward_levels():
+                while True:
+                    await level_ready.wait()
+                    level_ready.clear()
+                    result = on_audio_level(current_level)
+                    if asyncio.iscoroutine(result):
+                        await result
+                    await asyncio.sleep(LEVEL_UPDATE_INTERVAL)
             
             def callback(indata, frame_count, time_info, status):
-                nonlocal silence_frames
+                nonlocal silence_frames, written
                 
                 if status:
                     print(f"[Audio] {status}")
                 
-                # Calculate audio level
-                level = np.abs(indata).mean()
+                count = min(frame_count, max_samples - written)
+                if count <= 0:
+                    return
                 
-                # Note: Can't call async from sync callback, skip level updates
+                block = buf[written:written + count]
+                block[:] = indata[:count, 0]
+                written += count
+                
+                # Calculate audio level (mean power)
+                level_sq = float(np.dot(block, block)) / count
+                
+                if on_audio_level:
+                    # Report RMS on the int16 scale the UI expects
+                    loop.call_soon_threadsafe(push_level, float(np.sqrt(level_sq)) * 32768.0)
                 
                 # Check for silence
-                if level < silence_threshold and len(frames) > self._sample_rate:
+                if level_sq < threshold_sq and written > min_samples:
                     silence_frames += 1
                 else:
                     silence_frames = 0
-                
-                frames.append(indata.copy())
+            
+            level_task = asyncio.create_task(forward_levels()) if on_audio_level else None
             
             # Record with silence detection
-            with sd.InputStream(
-                samplerate=self._sample_rate,
-                channels=1,
-                dtype=np.float32,
-                blocksize=1024,
-                callback=callback
-            ):
-                start_time = asyncio.get_event_loop().time()
-                
-                while True:
-                    await asyncio.sleep(0.1)
-                    
-                    # Check for stop conditions
-                    elapsed = asyncio.get_event_loop().time() - start_time
-                    
-                    if elapsed >= duration:
-                        print("[STT] Max duration reached")
-                        break
+            try:
+                with sd.InputStream(
+                    samplerate=self._sample_rate,
+                    channels=1,
+                    dtype=np.float32,
+                    blocksize=block_size,
+                    callback=callback
+                ):
+                    start_time = asyncio.get_event_loop().time()
                     
-                    if silence_frames >= max_silence_frames and len(frames) > 10:
-                        print("[STT] Silence detected, stopping")
-                        break
+                    while True:
+                        await asyncio.sleep(0.1)
+                        
+                        # Check for stop conditions
+                        elapsed = asyncio.get_event_loop().time() - start_time
+                        
+                        if elapsed >= duration or written >= max_samples:
+                            print("[STT] Max duration reached")
+                            break
+                        
+                        if silence_frames >= max_silence_frames and written > 10 * block_size:
+                            print("[STT] Silence detected, stopping")
+                            break
+            finally:
+                if level_task:
+                    level_task.cancel()
             
-            # Combine frames
-            if frames:
-                audio = np.concatenate(frames, axis=0).flatten()
+            # Hand Whisper a contiguous float32 view of what was recorded
+            if written:
+                audio = buf[:written]
                 print(f"[STT] Recorded {len(audio) / self._sample_rate:.1f}s of audio")
                 return audio
             
@@ -156,22 +228,28 @@ class SpeechToText:
         
         self._load_model()
         
-        if self._model is None:
+        if self._pipeline is None:
             return ""
         
         try:
             print("[STT] Transcribing...")
             
-            # Run transcription in thread pool to not block
+            # Run transcription in thread pool to not block. Segments are
+            # decoded lazily, so consume them there too.
             loop = asyncio.get_event_loop()
-            segments, info = await loop.run_in_executor(
+            segments = await loop.run_in_executor(
                 None,
-                lambda: self._model.transcribe(
+                lambda: list(self._pipeline.transcribe(
                     audio,
-                    beam_size=5,
                     language="en",
-                    vad_filter=True  # Voice activity detection
-                )
+                    # Short voice commands: greedy decoding is plenty
+                    beam_size=1,
+                    best_of=1,
+                    condition_on_previous_text=False,
+                    without_timestamps=True,
+                    vad_filter=True,  # Voice activity detection
+                    vad_parameters=dict(min_silence_duration_ms=300)
+                )[0])
             )
             
             # Combine segments
@@ -208,4 +286,4 @@ class SpeechToText:
 
 
 # Global instance
-stt_engine = SpeechToText(model_size="base")
+stt_engine = SpeechToText(model_size=settings.whisper_model)
@@ -4,10 +4,79 @@ Handles Spotify Web API for music control and now playing.
 """
 import asyncio
 import time
-from typing import Optional, Dict, Any
-import spotipy
+from typing import Optional, Dict, Any, List, Tuple
 from spotipy.oauth2 import SpotifyOAuth
 from .config import settings
+from .http import shared_client, spotify_limiter
+
+
+class SpotifyAPIError(Exception):
+    """Error response from the Spotify Web API."""
+    
+    def __init__(self, status_code: int, message: str):
+        super().__init__(f"HTTP {status_code}: {message}")
+        self.status_code = status_code
+
+
+class SpotifyWebAPI:
+    """
+    Minimal async Spotify Web API client.
+    Uses the shared pooled HTTP/2 client so calls skip the TCP/TLS handshake.
+    """
+    
+    BASE_URL = "https://api.spotify.com/v1"
+    
+    def __init__(self):
+        self._headers: Dict[str, str] = {}
+    
+    def set_token(self, access_token: str):
+        """Use a new access token for subsequent requests."""
+        self._headers["Authorization"] = f"Bearer {access_token}"
+    
+    async def _request(self, method: str, path: str, **kwargs) -> Optional[Dict[str, Any]]:
+        """Send a request and return the decoded JSON body, if any."""
+        async with spotify_limiter:
+            response = await shared_client.request(
+                method, self.BASE_URL + path, headers=self._headers, **kwargs
+            )
+        if response.status_code >= 400:
+            raise SpotifyAPIError(response.status_code, response.text)
+        if response.status_code == 204 or not response.content:
+            return None
+        return response.json()
+    
+    async def search(self, q: str, type: str = "track", limit: int = 10) -> Dict[str, Any]:
+        """Search the Spotify catalog."""
+        return await self._request("GET", "/search", params={"q": q, "type": type, "limit": limit})
+    
+    async def current_playback(self) -> Optional[Dict[str, Any]]:
+        """Get the current playback state, or None if nothing is active."""
+        return await self._request("GET", "/me/player")
+    
+    async def start_playback(self, uris: Optional[List[str]] = None, context_uri: Optional[str] = None):
+        """Start or resume playback, optionally of specific tracks or a context."""
+        body = {}
+        if uris:
+            body["uris"] = uris
+        if context_uri:
+            body["context_uri"] = context_uri
+        await self._request("PUT", "/me/player/play", json=body or None)
+    
+    async def pause_playback(self):
+        """Pause playback."""
+        await self._request("PUT", "/me/player/pause")
+    
+    async def next_track(self):
+        """Skip to the next track."""
+        await self._request("POST", "/me/player/next")
+    
+    async def previous_track(self):
+        """Go back to the previous track."""
+        await self._request("POST", "/me/player/previous")
+    
+    async def volume(self, volume_percent: int):
+        """Set playback volume (0-100)."""
+        await self._request("PUT", "/me/player/volume", params={"volume_percent": volume_percent})
 
 
 class SpotifyClient:
@@ -20,38 +89,39 @@ class SpotifyClient:
         "playlist-read-private",
         "user-library-read",
     ]
+    SCOPE_STR = " ".join(SCOPES)
+    
+    # How long a now playing result is reused before asking Spotify again
+    NOW_PLAYING_TTL = 1.0
     
     def __init__(self):
-        self.sp: Optional[spotipy.Spotify] = None
+        self.sp = SpotifyWebAPI()
         self._token_info: Optional[Dict] = None
         self._last_now_playing: Optional[Dict] = None
         self._oauth: Optional[SpotifyOAuth] = None
+        self._np_cache: Optional[Tuple[float, Optional[Dict]]] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+    
+    def _get_oauth(self) -> SpotifyOAuth:
+        """Get the shared OAuth manager, creating it on first use."""
+        if self._oauth is None:
+            self._oauth = SpotifyOAuth(
+                client_id=settings.spotify_client_id,
+                client_secret=settings.spotify_client_secret,
+                redirect_uri=settings.spotify_redirect_uri,
+                scope=self.SCOPE_STR,
+                cache_path=".spotify_cache"
+            )
+        return self._oauth
     
     def get_auth_url(self) -> str:
         """Get the Spotify authorization URL."""
-        self._oauth = SpotifyOAuth(
-            client_id=settings.spotify_client_id,
-            client_secret=settings.spotify_client_secret,
-            redirect_uri=settings.spotify_redirect_uri,
-            scope=" ".join(self.SCOPES),
-            cache_path=".spotify_cache"
-        )
-        return self._oauth.get_authorize_url()
+        return self._get_oauth().get_authorize_url()
     
     def authenticate_with_code(self, code: str) -> bool:
         """Complete authentication with the authorization code."""
         try:
-            if not self._oauth:
-                self._oauth = SpotifyOAuth(
-                    client_id=settings.spotify_client_id,
-                    client_secret=settings.spotify_client_secret,
-                    redirect_uri=settings.spotify_redirect_uri,
-                    scope=" ".join(self.SCOPES),
-                    cache_path=".spotify_cache"
-                )
-            
-            self._token_info = self._oauth.get_access_token(code)
-            self.sp = spotipy.Spotify(auth=self._token_info['access_token'])
+            self._set_token(self._get_oauth().get_access_token(code))
             print("[Spotify] Successfully authenticated!")
             return True
         except Exception as e:
@@ -61,18 +131,9 @@ class SpotifyClient:
     def load_cached_token(self) -> bool:
         """Try to load a cached token."""
         try:
-            self._oauth = SpotifyOAuth(
-                client_id=settings.spotify_client_id,
-                client_secret=settings.spotify_client_secret,
-                redirect_uri=settings.spotify_redirect_uri,
-                scope=" ".join(self.SCOPES),
-                cache_path=".spotify_cache"
-            )
-            
-            token_info = self._oauth.get_cached_token()
+            token_info = self._get_oauth().get_cached_token()
             if token_info:
-                self._token_info = token_info
-                self.sp = spotipy.Spotify(auth=token_info['access_token'])
+                self._set_token(token_info)
                 print("[Spotify] Loaded cached token")
                 return True
             return False
@@ -80,35 +141,41 @@ class SpotifyClient:
             print(f"[Spotify] Error loading cached token: {e}")
             return False
     
-    def _ensure_token(self):
+    def _set_token(self, token_info: Dict):
+        """Store token info and hand the access token to the API client."""
+        self._token_info = token_info
+        self.sp.set_token(token_info['access_token'])
+    
+    async def _ensure_token(self):
         """Ensure we have a valid token, refreshing if needed."""
-        if not self._oauth or not self._token_info:
+        if not self._token_info:
             return False
         
-        if self._oauth.is_token_expired(self._token_info):
+        oauth = self._get_oauth()
+        if oauth.is_token_expired(self._token_info):
             print("[Spotify] Refreshing expired token...")
-            self._token_info = self._oauth.refresh_access_token(
+            self._set_token(await asyncio.to_thread(
+                oauth.refresh_access_token,
                 self._token_info['refresh_token']
-            )
-            self.sp = spotipy.Spotify(auth=self._token_info['access_token'])
+            ))
         
         return True
     
     def is_authenticated(self) -> bool:
         """Check if we're authenticated with Spotify."""
-        return self.sp is not None
+        return self._token_info is not None
     
     # ==================== Playback Control ====================
     
     async def play(self, query: str = None, content_type: str = "track") -> str:
         """Play music on Spotify."""
-        if not self._ensure_token():
+        if not await self._ensure_token():
             return "Not connected to Spotify. Please authenticate first."
         
         try:
             if query:
                 # Search for the content
-                results = self.sp.search(q=query, type=content_type, limit=1)
+                results = await self.sp.search(q=query, type=content_type, limit=1)
                 
                 key = f"{content_type}s"
                 if results[key]['items']:
@@ -117,19 +184,21 @@ class SpotifyClient:
                     name = item['name']
                     
                     if content_type == "track":
-                        self.sp.start_playback(uris=[uri])
+                        await self.sp.start_playback(uris=[uri])
                     else:
-                        self.sp.start_playback(context_uri=uri)
+                        await self.sp.start_playback(context_uri=uri)
+                    self._np_cache = None
                     
                     return f"Now playing: {name}"
                 else:
                     return f"Couldn't find {content_type}: {query}"
             else:
                 # Just resume playback
-                self.sp.start_playback()
+                await self.sp.start_playback()
+                self._np_cache = None
                 return "Resuming playback"
                 
-        except spotipy.SpotifyException as e:
+        except SpotifyAPIError as e:
             if "NO_ACTIVE_DEVICE" in str(e):
                 return "No active Spotify device found. Please open Spotify on a device."
             return f"Spotify error: {e}"
@@ -138,79 +207,106 @@ class SpotifyClient:
     
     async def pause(self) -> str:
         """Pause playback."""
-        if not self._ensure_token():
+        if not await self._ensure_token():
             return "Not connected to Spotify."
         
         try:
-            self.sp.pause_playback()
+            await self.sp.pause_playback()
+            self._np_cache = None
             return "Paused"
         except Exception as e:
             return f"Error pausing: {e}"
     
     async def resume(self) -> str:
         """Resume playback."""
-        if not self._ensure_token():
+        if not await self._ensure_token():
             return "Not connected to Spotify."
         
         try:
-            self.sp.start_playback()
+            await self.sp.start_playback()
+            self._np_cache = None
             return "Resumed"
         except Exception as e:
             return f"Error resuming: {e}"
     
     async def skip(self) -> str:
         """Skip to next track."""
-        if not self._ensure_token():
+        if not await self._ensure_token():
             return "Not connected to Spotify."
         
         try:
-            self.sp.next_track()
-            await asyncio.sleep(0.5)  # Wait for track change
-            now = await self.get_now_playing()
-            if now and now.get('track_name'):
-                return f"Skipped to: {now['track_name']}"
+            await self.sp.next_track()
+            self._np_cache = None
+            self._schedule_now_playing_refresh()
             return "Skipped to next track"
         except Exception as e:
             return f"Error skipping: {e}"
     
     async def previous(self) -> str:
         """Go to previous track."""
-        if not self._ensure_token():
+        if not await self._ensure_token():
             return "Not connected to Spotify."
         
         try:
-            self.sp.previous_track()
-            await asyncio.sleep(0.5)
-            now = await self.get_now_playing()
-            if now and now.get('track_name'):
-                return f"Playing: {now['track_name']}"
+            await self.sp.previous_track()
+            self._np_cache = None
+            self._schedule_now_playing_refresh()
             return "Playing previous track"
         except Exception as e:
             return f"Error: {e}"
     
     async def set_volume(self, volume: int) -> str:
         """Set playback volume (0-100)."""
-        if not self._ensure_token():
+        if not await self._ensure_token():
             return "Not connected to Spotify."
         
         try:
             volume = max(0, min(100, volume))
-            self.sp.volume(volume)
+            await self.sp.volume(volume)
             return f"Volume set to {volume}%"
         except Exception as e:
             return f"Error setting volume: {e}"
     
+    def _schedule_now_playing_refresh(self, delay: float = 0.5):
+        """Refresh now playing in the background once the track change lands."""
+        # Only the latest track change matters, drop a refresh still waiting
+        if self._refresh_task and not self._refresh_task.done():
+            self._refresh_task.cancel()
+        self._refresh_task = asyncio.create_task(self._refresh_now_playing_soon(delay))
+    
+    async def _refresh_now_playing_soon(self, delay: float):
+        """Wait for Spotify to switch tracks, then repopulate the now playing cache."""
+        await asyncio.sleep(delay)
+        # A poll may have cached the old track before Spotify switched
+        self._np_cache = None
+        await self.get_now_playing()
+    
     # ==================== Now Playing ====================
     
     async def get_now_playing(self) -> Optional[Dict[str, Any]]:
         """Get current playback information."""
-        if not self._ensure_token():
+        if not await self._ensure_token():
             return None
         
+        # Serve recent results from cache, advancing progress locally
+        now = time.monotonic()
+        if self._np_cache and now - self._np_cache[0] < self.NOW_PLAYING_TTL:
+            cached_at, cached = self._np_cache
+            if cached is None:
+                return None
+            data = dict(cached)
+            if data["is_playing"]:
+                data["progress_ms"] = min(
+                    data["progress_ms"] + int((now - cached_at) * 1000),
+                    data["duration_ms"]
+                )
+            return data
+        
         try:
-            playback = self.sp.current_playback()
+            playback = await self.sp.current_playback()
             
             if not playback or not playback.get('item'):
+                self._np_cache = (now, None)
                 return None
             
             item = playback['item']
@@ -218,8 +314,9 @@ class SpotifyClient:
             
             data = {
                 "is_playing": playback.get('is_playing', False),
-                "progress_ms": playback.get('progress_ms', 0),
-                "duration_ms": item.get('duration_ms', 0),
+                # Spotify sends null for these at times
+                "progress_ms": playback.get('progress_ms') or 0,
+                "duration_ms": item.get('duration_ms') or 0,
                 "is_podcast": is_podcast,
             }
             
@@ -239,12 +336,31 @@ class SpotifyClient:
                 })
             
             self._last_now_playing = data
-            return data
+            self._np_cache = (now, data)
+            return dict(data)
             
         except Exception as e:
             print(f"[Spotify] Error getting now playing: {e}")
             return self._last_now_playing
     
+    async def get_track_info(self, query: str) -> Optional[Dict[str, Any]]:
+        """Get info about the best matching track."""
+        if not await self._ensure_token():
+            return None
+        
+        results = await self.sp.search(q=query, type="track", limit=1)
+        items = results["tracks"]["items"]
+        if not items:
+            return None
+        
+        track = items[0]
+        return {
+            "title": track["name"],
+            "artist": ", ".join(a["name"] for a in track["artists"]) or "Unknown",
+            "album": track["album"]["name"],
+            "uri": track["uri"]
+        }
+    
     async def get_lyrics(self) -> Optional[str]:
         """
         Get lyrics for current track.
@@ -2,20 +2,60 @@
 Son of Anton - Tool Executor
 Handles execution of Gemini function calls.
 """
-import httpx
-from datetime import datetime
+import re
+import time
+from datetime import datetime, tzinfo
 import pytz
-from typing import Dict, Any
+from selectolax.lexbor import LexborHTMLParser
+from typing import Awaitable, Callable, Dict, Any, Optional, Tuple
 
 from .music_manager import music_manager
 from .config import settings
+from .http import shared_client
+
+
+# Collapses whitespace in fetched page text
+_RE_WS = re.compile(r'\s+')
+
+# Maximum bytes of a web page downloaded by fetch_web_content
+MAX_FETCH_BYTES = 32 * 1024
+
+# OpenWeather only updates every ~10 minutes, reuse results for 5
+WEATHER_CACHE_TTL = 300
 
 
 class ToolExecutor:
     """Executes tool calls from Gemini AI."""
     
     def __init__(self):
-        self._http_client = httpx.AsyncClient(timeout=30.0)
+        self._http_client = shared_client
+        self._tz_cache: Dict[str, tzinfo] = {}
+        # (timezone, wall-clock second) -> formatted time
+        self._time_string_cache: Dict[Tuple[str, int], str] = {}
+        # (location, units) -> (fetched at, ETag, response data)
+        self._weather_cache: Dict[Tuple[str, str], Tuple[float, Optional[str], Dict[str, Any]]] = {}
+        
+        # Tool name -> handler
+        self._dispatch: Dict[str, Callable[[Dict[str, Any]], Awaitable[str]]] = {
+            "play_music": self._play,
+            "spotify_play": self._play,
+            "pause_music": self._pause,
+            "spotify_pause": self._pause,
+            "resume_music": self._resume,
+            "spotify_resume": self._resume,
+            "skip_track": self._skip,
+            "spotify_skip": self._skip,
+            "previous_track": self._previous,
+            "spotify_previous": self._previous,
+            "set_volume": self._set_volume,
+            "spotify_volume": self._set_volume,
+            "now_playing": self._now_playing,
+            "spotify_now_playing": self._now_playing,
+            "search_music": self._search_music,
+            "get_weather": self._weather,
+            "get_current_time": self._current_time,
+            "fetch_web_content": self._web_content,
+        }
     
     async def execute(self, tool_name: str, args: Dict[str, Any]) -> str:
         """
@@ -30,103 +70,134 @@ class ToolExecutor:
         """
         print(f"[Tools] Executing: {tool_name}({args})")
         
+        handler = self._dispatch.get(tool_name)
+        if handler is None:
+            return f"Unknown tool: {tool_name}"
+        
         try:
-            # Music tools (uses Spotify or YouTube Music automatically)
-            if tool_name == "play_music" or tool_name == "spotify_play":
-                query = args.get("query")
-                content_type = args.get("type", "track")
-                return await music_manager.play(query, content_type)
-            
-            elif tool_name == "pause_music" or tool_name == "spotify_pause":
-                return await music_manager.pause()
-            
-            elif tool_name == "resume_music" or tool_name == "spotify_resume":
-                return await music_manager.resume()
-            
-            elif tool_name == "skip_track" or tool_name == "spotify_skip":
-                return await music_manager.skip()
-            
-            elif tool_name == "previous_track" or tool_name == "spotify_previous":
-                return await music_manager.previous()
-            
-            elif tool_name == "set_volume" or tool_name == "spotify_volume":
-                volume = args.get("volume", 50)
-                return await music_manager.set_volume(volume)
-            
-            elif tool_name == "now_playing" or tool_name == "spotify_now_playing":
-                now = await music_manager.get_now_playing()
-                if now:
-                    source = now.get("source", "music service")
-                    if now.get("is_podcast"):
-                        return f"Currently playing podcast: {now['episode_name']} from {now['show_name']} (on {source})"
-                    else:
-                        return f"Currently playing: {now['track_name']} by {now['artist_name']} (on {source})"
-                return "Nothing is currently playing."
-            
-            elif tool_name == "search_music":
-                query = args.get("query", "")
-                return await music_manager.search(query)
-            
-            # Weather tool
-            elif tool_name == "get_weather":
-                location = args.get("location", "New York")
-                return await self._get_weather(location)
-            
-            # Time tool
-            elif tool_name == "get_current_time":
-                timezone = args.get("timezone", "America/Toronto")
-                return self._get_time(timezone)
-            
-            # Web fetch tool
-            elif tool_name == "fetch_web_content":
-                url = args.get("url", "")
-                return await self._fetch_web_content(url)
-            
-            else:
-                return f"Unknown tool: {tool_name}"
-                
+            return await handler(args)
         except Exception as e:
             print(f"[Tools] Error executing {tool_name}: {e}")
             return f"Error executing tool: {e}"
     
+    # ==================== Music ====================
+    # Uses Spotify or YouTube Music automatically
+    
+    async def _play(self, args: Dict[str, Any]) -> str:
+        query = args.get("query")
+        content_type = args.get("type", "track")
+        return await music_manager.play(query, content_type)
+    
+    async def _pause(self, args: Dict[str, Any]) -> str:
+        return await music_manager.pause()
+    
+    async def _resume(self, args: Dict[str, Any]) -> str:
+        return await music_manager.resume()
+    
+    async def _skip(self, args: Dict[str, Any]) -> str:
+        return await music_manager.skip()
+    
+    async def _previous(self, args: Dict[str, Any]) -> str:
+        return await music_manager.previous()
+    
+    async def _set_volume(self, args: Dict[str, Any]) -> str:
+        volume = args.get("volume", 50)
+        return await music_manager.set_volume(volume)
+    
+    async def _now_playing(self, args: Dict[str, Any]) -> str:
+        now = await music_manager.get_now_playing()
+        if now:
+            source = now.get("source", "music service")
+            if now.get("is_podcast"):
+                return f"Currently playing podcast: {now['episode_name']} from {now['show_name']} (on {source})"
+            else:
+                return f"Currently playing: {now['track_name']} by {now['artist_name']} (on {source})"
+        return "Nothing is currently playing."
+    
+    async def _search_music(self, args: Dict[str, Any]) -> str:
+        query = args.get("query", "")
+        return await music_manager.search(query)
+    
+    # ==================== Info ====================
+    
+    async def _weather(self, args: Dict[str, Any]) -> str:
+        location = args.get("location", "New York")
+        return await self._get_weather(location)
+    
+    async def _current_time(self, args: Dict[str, Any]) -> str:
+        timezone = args.get("timezone", "America/Toronto")
+        return self._get_time(timezone)
+    
+    async def _web_content(self, args: Dict[str, Any]) -> str:
+        url = args.get("url", "")
+        return await self._fetch_web_content(url)
+    
     async def _get_weather(self, location: str) -> str:
         """Get weather using OpenWeather API."""
         if not settings.openweather_api_key:
             return "Weather service not configured. Add OPENWEATHER_API_KEY to .env"
         
+        units = "imperial"  # Fahrenheit
+        key = (location.strip().lower(), units)
+        cached = self._weather_cache.get(key)
+        
         try:
-            url = "https://api.openweathermap.org/data/2.5/weather"
-            params = {
-                "q": location,
-                "appid": settings.openweather_api_key,
-                "units": "imperial"  # Fahrenheit
-            }
+            if cached and time.monotonic() - cached[0] < WEATHER_CACHE_TTL:
+                data = cached[2]
+            else:
+                url = "https://api.openweathermap.org/data/2.5/weather"
+                params = {
+                    "q": location,
+                    "appid": settings.openweather_api_key,
+                    "units": units
+                }
+                headers = {}
+                if cached and cached[1]:
+                    headers["If-None-Match"] = cached[1]
+                
+                response = await self._http_client.get(url, params=params, headers=headers)
+                
+                if response.status_code == 304 and cached:
+                    data = cached[2]
+                    self._weather_cache[key] = (time.monotonic(), cached[1], data)
+                elif response.status_code == 200:
+                    data = response.json()
+                    self._weather_cache[key] = (time.monotonic(), response.headers.get("ETag"), data)
+                else:
+                    return f"Couldn't get weather for {location}"
             
-            response = await self._http_client.get(url, params=params)
-            data = response.json()
+            temp = round(data["main"]["temp"])
+            feels_like = round(data["main"]["feels_like"])
+            desc = data["weather"][0]["description"]
+            humidity = data["main"]["humidity"]
             
-            if response.status_code == 200:
-                temp = round(data["main"]["temp"])
-                feels_like = round(data["main"]["feels_like"])
-                desc = data["weather"][0]["description"]
-                humidity = data["main"]["humidity"]
-                
-                return (
-                    f"Weather in {location}: {temp}°F (feels like {feels_like}°F), "
-                    f"{desc}, {humidity}% humidity"
-                )
-            else:
-                return f"Couldn't get weather for {location}"
+            return (
+                f"Weather in {location}: {temp}°F (feels like {feels_like}°F), "
+                f"{desc}, {humidity}% humidity"
+            )
                 
         except Exception as e:
             return f"Weather error: {e}"
     
     def _get_time(self, timezone: str) -> str:
         """Get current time in specified timezone."""
+        key = (timezone, int(time.time()))
+        cached = self._time_string_cache.get(key)
+        if cached is not None:
+            return cached
+        
         try:
-            tz = pytz.timezone(timezone)
+            tz = self._tz_cache.get(timezone)
+            if tz is None:
+                tz = self._tz_cache[timezone] = pytz.timezone(timezone)
             now = datetime.now(tz)
-            return now.strftime("It's %I:%M %p on %A, %B %d, %Y")
+            result = now.strftime("It's %I:%M %p on %A, %B %d, %Y")
+            
+            # Entries from earlier seconds are never hit again
+            if len(self._time_string_cache) >= 32:
+                self._time_string_cache.clear()
+            self._time_string_cache[key] = result
+            return result
         except Exception:
             now = datetime.now()
             return now.strftime("It's %I:%M %p on %A, %B %d, %Y")
@@ -134,29 +205,47 @@ class ToolExecutor:
     async def _fetch_web_content(self, url: str) -> str:
         """Fetch and summarize web content."""
         try:
-            response = await self._http_client.get(url, follow_redirects=True)
-            
-            if response.status_code == 200:
-                # Get text content, limit length
-                content = response.text[:5000]
+            async with self._http_client.stream(
+                "GET", url, follow_redirects=True, timeout=30.0
+            ) as response:
+                if response.status_code != 200:
+                    return f"Failed to fetch {url}: HTTP {response.status_code}"
                 
-                # Basic HTML stripping
-                import re
-                content = re.sub(r'<script[^>]*>.*?</script>', '', content, flags=re.DOTALL)
-                content = re.sub(r'<style[^>]*>.*?</style>', '', content, flags=re.DOTALL)
-                content = re.sub(r'<[^>]+>', ' ', content)
-                content = re.sub(r'\s+', ' ', content).strip()
+                # Only download the start of the page, we only keep a summary
+                chunks = []
+                total = 0
+                async for chunk in response.aiter_bytes():
+                    chunks.append(chunk)
+                    total += len(chunk)
+                    if total >= MAX_FETCH_BYTES:
+                        break
                 
-                return f"Content from {url}: {content[:2000]}..."
-            else:
-                return f"Failed to fetch {url}: HTTP {response.status_code}"
+                content = b"".join(chunks)[:MAX_FETCH_BYTES].decode(
+                    response.charset_encoding or "utf-8", errors="replace"
+                )
+            
+            text = self._html_to_text(content)
+            text = _RE_WS.sub(' ', text).strip()[:2000]
+            
+            return f"Content from {url}: {text}..."
                 
         except Exception as e:
             return f"Error fetching URL: {e}"
     
-    async def close(self):
-        """Close HTTP client."""
-        await self._http_client.aclose()
+    @staticmethod
+    def _html_to_text(content: str) -> str:
+        """Extract the visible text of an HTML page, or return non-HTML as is."""
+        if not content:
+            return ""
+        try:
+            tree = LexborHTMLParser(content)
+            tree.strip_tags(["script", "style", "noscript"])
+            root = tree.body or tree.root
+            if root is None:
+                return content
+            return root.text(separator=' ', strip=True)
+        except Exception:
+            return content
 
 
 # Global instance
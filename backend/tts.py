@@ -3,18 +3,96 @@ Son of Anton - ElevenLabs Text-to-Speech
 Handles voice synthesis for natural speech output.
 """
 import asyncio
+import base64
+import hashlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import AsyncIterator, List, Optional
+import orjson
+import websockets
 from elevenlabs.client import ElevenLabs
 from elevenlabs import VoiceSettings
 from .config import settings
+from .http import shared_client
+
+
+class ProgressiveChunker:
+    """
+    Re-slices a PCM byte stream into frames that start small and grow.
+    
+    The first frame is only a few milliseconds long so playback can start
+    right away; each following frame doubles in size up to the target,
+    which keeps per-frame overhead low once audio is flowing.
+    """
+    
+    BYTES_PER_MS = 32  # 16 kHz, 16-bit mono PCM
+    
+    def __init__(self, start_ms: int = 20, target_ms: int = 200):
+        self.start_ms = start_ms
+        self.target_ms = target_ms
+        self._buf = bytearray()
+        self._next_ms = start_ms
+    
+    def feed(self, data: bytes) -> List[bytes]:
+        """Add audio and return every frame that is now complete."""
+        self._buf.extend(data)
+        frames = []
+        while True:
+            size = self._next_ms * self.BYTES_PER_MS
+            if len(self._buf) < size:
+                break
+            frames.append(bytes(self._buf[:size]))
+            del self._buf[:size]
+            self._next_ms = min(self._next_ms * 2, self.target_ms)
+        return frames
+    
+    def flush(self) -> bytes:
+        """Return whatever audio is left over (whole samples only)."""
+        size = len(self._buf) & ~1
+        data = bytes(self._buf[:size])
+        self.clear()
+        return data
+    
+    def clear(self):
+        """Drop buffered audio and start over with a small frame."""
+        self._buf.clear()
+        self._next_ms = self.start_ms
 
 
 class TTSEngine:
     """ElevenLabs Text-to-Speech engine."""
     
+    MODEL_ID = "eleven_turbo_v2_5"
+    
+    # Short phrases ("Paused", "Skipped to next track", ...) repeat a lot,
+    # so their audio is cached in memory and on disk
+    CACHE_MAX_CHARS = 200
+    MEMORY_CACHE_SIZE = 64
+    DISK_CACHE_SIZE = 512
+    CACHE_DIR = Path.home() / ".cache" / "neonpi" / "tts"
+    
+    # Concurrent ElevenLabs synthesis requests
+    MAX_CONCURRENT = 2
+    
+    # Short confirmations go straight to the REST endpoint as a small, low-bitrate MP3
+    SHORT_TEXT_CHARS = 80
+    SHORT_OUTPUT_FORMAT = "mp3_22050_32"
+    HTTP_URL = "https://api.elevenlabs.io/v1/text-to-speech/{voice_id}"
+    
+    STREAM_URL = (
+        "wss://api.elevenlabs.io/v1/text-to-speech/{voice_id}/stream-input"
+        "?model_id={model_id}&output_format=pcm_16000"
+    )
+    
     def __init__(self):
         self.client = ElevenLabs(api_key=settings.elevenlabs_api_key)
         self.voice_id = settings.elevenlabs_voice_id
         self._is_speaking = False
+        self._cache: OrderedDict[str, bytes] = OrderedDict()
+        self._active_chunker: Optional[ProgressiveChunker] = None
+        self._executor = ThreadPoolExecutor(max_workers=self.MAX_CONCURRENT, thread_name_prefix="tts")
+        self._sem = asyncio.Semaphore(self.MAX_CONCURRENT)
     
     async def speak(self, text: str) -> bytes:
         """
@@ -29,23 +107,28 @@ class TTSEngine:
         try:
             print(f"[TTS] Generating speech for: {text[:50]}...")
             
-            # Generate audio using ElevenLabs
-            audio_iterator = self.client.text_to_speech.convert(
-                voice_id=self.voice_id,
-                text=text,
-                model_id="eleven_turbo_v2_5",
-                voice_settings=VoiceSettings(
-                    stability=0.5,
-                    similarity_boost=0.75,
-                    style=0.0,
-                    use_speaker_boost=True
-                )
-            )
+            if len(text) > self.CACHE_MAX_CHARS:
+                audio_bytes = await self._synthesize(text)
+                print(f"[TTS] Generated {len(audio_bytes)} bytes of audio")
+                return audio_bytes
+            
+            key = self._cache_key(text)
+            audio_bytes = self._cache.get(key)
+            if audio_bytes is not None:
+                self._cache.move_to_end(key)
+                print("[TTS] Using cached audio")
+                return audio_bytes
             
-            # Collect audio bytes
-            audio_bytes = b""
-            for chunk in audio_iterator:
-                audio_bytes += chunk
+            audio_bytes = await asyncio.to_thread(self._read_disk_cache, key)
+            if audio_bytes is None:
+                audio_bytes = await self._synthesize(text)
+                if audio_bytes:
+                    await asyncio.to_thread(self._write_disk_cache, key, audio_bytes)
+            
+            if audio_bytes:
+                self._cache[key] = audio_bytes
+                if len(self._cache) > self.MEMORY_CACHE_SIZE:
+                    self._cache.popitem(last=False)
             
             print(f"[TTS] Generated {len(audio_bytes)} bytes of audio")
             return audio_bytes
@@ -54,34 +137,213 @@ class TTSEngine:
             print(f"[TTS] Error generating speech: {e}")
             return b""
     
-    async def speak_stream(self, text: str):
+    async def _synthesize(self, text: str) -> bytes:
+        """Synthesize text, using the quickest path for its length."""
+        if len(text) < self.SHORT_TEXT_CHARS:
+            return await self._speak_http(text)
+        return await self._run_blocking(self._sync_collect, text)
+    
+    async def _speak_http(self, text: str) -> bytes:
+        """Synthesize a short phrase with one async REST request."""
+        async with self._sem:
+            response = await shared_client.post(
+                self.HTTP_URL.format(voice_id=self.voice_id),
+                params={"output_format": self.SHORT_OUTPUT_FORMAT},
+                headers={"xi-api-key": settings.elevenlabs_api_key},
+                json={
+                    "text": text,
+                    "model_id": self.MODEL_ID,
+                    "voice_settings": {
+                        "stability": 0.5,
+                        "similarity_boost": 0.75,
+                        "style": 0.0,
+                        "use_speaker_boost": True
+                    }
+                },
+                timeout=30.0
+            )
+        response.raise_for_status()
+        return response.content
+    
+    async def _run_blocking(self, func, *args):
         """
-        Stream speech audio as it's generated.
-        Yields audio chunks for real-time playback.
+        Run a blocking ElevenLabs call on the TTS thread pool.
+        
+        The ElevenLabs client is blocking, so synthesis runs off the event loop;
+        the semaphore keeps a burst of requests waiting here instead of piling
+        up in the pool's queue.
         """
-        try:
-            print(f"[TTS] Streaming speech for: {text[:50]}...")
-            
-            audio_stream = self.client.text_to_speech.convert(
-                voice_id=self.voice_id,
-                text=text,
-                model_id="eleven_turbo_v2_5",
-                voice_settings=VoiceSettings(
-                    stability=0.5,
-                    similarity_boost=0.75
-                )
+        async with self._sem:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func, *args)
+    
+    def _sync_collect(self, text: str) -> bytes:
+        """Generate speech with ElevenLabs and collect the MP3 stream (blocking)."""
+        audio_iterator = self.client.text_to_speech.convert(
+            voice_id=self.voice_id,
+            text=text,
+            model_id=self.MODEL_ID,
+            voice_settings=VoiceSettings(
+                stability=0.5,
+                similarity_boost=0.75,
+                style=0.0,
+                use_speaker_boost=True
             )
+        )
+        
+        # Collect audio bytes
+        buf = bytearray()
+        for chunk in audio_iterator:
+            buf.extend(chunk)
+        return bytes(buf)
+    
+    def _cache_key(self, text: str) -> str:
+        """Content address for a phrase spoken with the current voice, model and format."""
+        output_format = self.SHORT_OUTPUT_FORMAT if len(text) < self.SHORT_TEXT_CHARS else "default"
+        return hashlib.sha256(
+            f"{self.voice_id}|{self.MODEL_ID}|{output_format}|{text}".encode()
+        ).hexdigest()
+    
+    def _read_disk_cache(self, key: str) -> Optional[bytes]:
+        """Read a phrase from the disk cache, if present (blocking)."""
+        path = self.CACHE_DIR / f"{key}.mp3"
+        try:
+            audio_bytes = path.read_bytes()
+            path.touch()  # Mark as recently used
+            return audio_bytes
+        except OSError:
+            return None
+    
+    def _write_disk_cache(self, key: str, audio_bytes: bytes):
+        """Store a phrase in the disk cache (blocking)."""
+        try:
+            self.CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            (self.CACHE_DIR / f"{key}.mp3").write_bytes(audio_bytes)
+            self._prune_disk_cache()
+        except OSError as e:
+            print(f"[TTS] Couldn't write audio cache: {e}")
+    
+    def _prune_disk_cache(self):
+        """Drop the least recently used files once the disk cache is full."""
+        files = list(self.CACHE_DIR.glob("*.mp3"))
+        if len(files) <= self.DISK_CACHE_SIZE:
+            return
+        files.sort(key=lambda f: f.stat().st_mtime)
+        for f in files[:len(files) - self.DISK_CACHE_SIZE]:
+            f.unlink(missing_ok=True)
+    
+    async def speak_stream(
+        self,
+        token_iter: AsyncIterator[str],
+        prebuffer_ms: int = 300
+    ) -> AsyncIterator[bytes]:
+        """
+        Stream speech audio while the text is still being generated.
+        
+        Text is fed to the ElevenLabs input-streaming WebSocket as it arrives,
+        so audio for the start of a reply comes back before the LLM finishes.
+        
+        Args:
+            token_iter: Async iterator of text fragments (e.g. LLM stream deltas)
+            prebuffer_ms: Audio to buffer before the first frame is yielded, so
+                network jitter doesn't cause playback underruns
             
-            for chunk in audio_stream:
-                yield chunk
+        Yields:
+            16 kHz 16-bit mono PCM frames, starting at 20ms and growing to 200ms
+        """
+        url = self.STREAM_URL.format(voice_id=self.voice_id, model_id=self.MODEL_ID)
+        chunker = ProgressiveChunker(start_ms=20, target_ms=200)
+        self._active_chunker = chunker
+        frames: asyncio.Queue = asyncio.Queue(maxsize=32)
+        
+        try:
+            async with websockets.connect(url) as ws:
+                # Beginning of stream: voice settings and credentials
+                await ws.send(orjson.dumps({
+                    "text": " ",
+                    "voice_settings": {
+                        "stability": 0.5,
+                        "similarity_boost": 0.75
+                    },
+                    "xi_api_key": settings.elevenlabs_api_key
+                }).decode())
+                
+                sender = asyncio.create_task(self._send_text(ws, token_iter))
+                pump = asyncio.create_task(self._pump_audio(ws, chunker, frames))
+                try:
+                    # Hold playback back until enough audio is queued
+                    done = False
+                    prebuffer = []
+                    buffered_ms = 0
+                    while buffered_ms < prebuffer_ms:
+                        frame = await frames.get()
+                        if frame is None:
+                            done = True
+                            break
+                        prebuffer.append(frame)
+                        buffered_ms += len(frame) // ProgressiveChunker.BYTES_PER_MS
+                    
+                    for frame in prebuffer:
+                        yield frame
+                    
+                    # Then yield steadily while the pump keeps refilling
+                    while not done:
+                        frame = await frames.get()
+                        if frame is None:
+                            break
+                        yield frame
+                    
+                    await pump
+                    await sender
+                finally:
+                    sender.cancel()
+                    pump.cancel()
+                    chunker.clear()
+                    if self._active_chunker is chunker:
+                        self._active_chunker = None
                 
         except Exception as e:
             print(f"[TTS] Streaming error: {e}")
     
-    def list_voices(self):
+    async def _send_text(self, ws, token_iter: AsyncIterator[str]):
+        """Forward text fragments to the ElevenLabs stream, then end it."""
+        async for token in token_iter:
+            if token:
+                await ws.send(orjson.dumps({
+                    "text": token,
+                    "try_trigger_generation": True
+                }).decode())
+        # End of stream: flush whatever is left
+        await ws.send('{"text": ""}')
+    
+    async def _pump_audio(self, ws, chunker: ProgressiveChunker, frames: asyncio.Queue):
+        """Read audio from the ElevenLabs stream into frames, ending with None."""
+        try:
+            async for message in ws:
+                data = orjson.loads(message)
+                if data.get("audio"):
+                    for frame in chunker.feed(base64.b64decode(data["audio"])):
+                        await frames.put(frame)
+                if data.get("isFinal"):
+                    break
+            
+            tail = chunker.flush()
+            if tail:
+                await frames.put(tail)
+        except Exception:
+            await frames.put(None)
+            raise
+        await frames.put(None)
+    
+    def interrupt_stream(self):
+        """Discard buffered audio of the active stream, e.g. when the user barges in."""
+        if self._active_chunker is not None:
+            self._active_chunker.clear()
+    
+    async def list_voices(self):
         """List available voices from ElevenLabs."""
         try:
-            response = self.client.voices.get_all()
+            response = await asyncio.to_thread(self.client.voices.get_all)
             return [
                 {"id": v.voice_id, "name": v.name}
                 for v in response.voices
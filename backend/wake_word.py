@@ -5,40 +5,101 @@ Uses OpenWakeWord for always-on "Hey Neon" detection.
 import asyncio
 import numpy as np
 import threading
+import time
+from pathlib import Path
 from typing import Callable, Optional
-import queue
+
+try:
+    import sounddevice as sd
+    _HAS_SD = True
+except (ImportError, OSError):
+    sd = None
+    _HAS_SD = False
+
+
+# INT8 copies of the pre-trained wake word models, created by install.sh
+MODEL_CACHE_DIR = Path.home() / ".cache" / "neonpi" / "wakeword"
+
+
+def _stock_model_path(wake_word: str) -> Path:
+    """Path of the pre-trained ONNX model shipped with OpenWakeWord."""
+    import openwakeword
+    return Path(openwakeword.MODELS[wake_word]["model_path"]).with_suffix(".onnx")
+
+
+def quantized_model_path(wake_word: str) -> Path:
+    """Where the INT8 copy of a pre-trained wake word model is stored."""
+    return MODEL_CACHE_DIR / f"{_stock_model_path(wake_word).stem}_int8.onnx"
+
+
+def quantize_model(wake_word: str) -> Path:
+    """
+    Quantize a pre-trained wake word model to INT8 (needs the onnx package).
+    
+    Slow and blocking, so it runs once at install time rather than on start.
+    """
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    
+    target = quantized_model_path(wake_word)
+    MODEL_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    quantize_dynamic(str(_stock_model_path(wake_word)), str(target), weight_type=QuantType.QInt8)
+    return target
 
 
 class WakeWordDetector:
     """
     Wake word detector using OpenWakeWord.
     Uses pre-trained 'hey_jarvis' model temporarily until custom 'hey_neon' is trained.
+    
+    on_wake must be a coroutine function; it is scheduled on the event loop
+    that called start(), so it can share state with the rest of the app.
     """
     
+    SAMPLE_RATE = 16000
+    CHUNK_SIZE = 1280  # ~80ms at 16kHz
+    RING_SIZE = 16  # Chunks of audio held between the callback and the model (~1.3s)
+    COOLDOWN = 2.0  # Seconds to ignore the wake word after a detection
+    
     def __init__(
         self,
         wake_word: str = "hey_jarvis",  # Temporary until we train "hey_neon"
         sensitivity: float = 0.5,
-        on_wake: Optional[Callable] = None
+        on_wake: Optional[Callable] = None,
+        batch_chunks: int = 2,
+        threads: int = 2
     ):
         self.wake_word = wake_word
         self.sensitivity = sensitivity
         self.on_wake = on_wake
+        self.batch_chunks = batch_chunks
+        self.threads = threads
         self._running = False
         self._thread: Optional[threading.Thread] = None
-        self._audio_queue = queue.Queue()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
         self._model = None
         self._stream = None
+        self._last_wake = 0.0
+        
+        # Single-writer (audio callback) / single-reader (detection loop) ring buffer.
+        # RING_SIZE is a multiple of batch_chunks so a batch never wraps around.
+        ring_size = -(-self.RING_SIZE // batch_chunks) * batch_chunks
+        self._ring = np.zeros((ring_size, self.CHUNK_SIZE), dtype=np.int16)
+        self._write_count = 0
+        self._read_count = 0
+        self._data_ready = threading.Event()
+        self._xruns = 0
     
     def _load_model(self):
         """Load the OpenWakeWord model."""
         try:
             from openwakeword.model import Model
             
-            # Load pre-trained model
+            # Load pre-trained model, quantized to INT8 when available. ncpu pins the
+            # ONNX Runtime threads used by the melspectrogram and embedding models.
             self._model = Model(
-                wakeword_models=[self.wake_word],
-                inference_framework="onnx"
+                wakeword_models=[self._model_path()],
+                inference_framework="onnx",
+                ncpu=self.threads
             )
             print(f"[WakeWord] Loaded model: {self.wake_word}")
             return True
@@ -49,51 +110,104 @@ class WakeWordDetector:
             print(f"[WakeWord] Error loading model: {e}")
             return False
     
+    def _model_path(self) -> str:
+        """Use the INT8 model made by install.sh if it exists, else the stock FP32 one."""
+        try:
+            target = quantized_model_path(self.wake_word)
+            if target.exists():
+                return str(target)
+        except Exception as e:
+            print(f"[WakeWord] Couldn't locate INT8 model: {e}")
+        
+        print("[WakeWord] INT8 model not found, using FP32 (run install.sh to create it)")
+        return self.wake_word
+    
     def _audio_callback(self, indata, frames, time_info, status):
-        """Callback for audio stream - adds audio to queue."""
+        """Callback for audio stream - copies audio into the ring buffer without allocating."""
         if status:
-            print(f"[Audio] Status: {status}")
-        self._audio_queue.put(indata.copy())
+            # Counted here, reported by the detection loop (no printing in the audio thread)
+            self._xruns += 1
+        np.copyto(self._ring[self._write_count % len(self._ring)], indata[:, 0])
+        self._write_count += 1
+        self._data_ready.set()
+    
+    def _next_batch(self) -> Optional[np.ndarray]:
+        """Return a contiguous view of the next batch_chunks chunks, if they're ready."""
+        k = self.batch_chunks
+        available = self._write_count - self._read_count
+        if available < k:
+            return None
+        
+        # Fell too far behind, the oldest chunks are being overwritten
+        if available > len(self._ring) - k:
+            skip = (available - k) // k * k
+            self._read_count += skip
+            print(f"[WakeWord] Detection falling behind, dropped {skip} chunks")
+        
+        start = self._read_count % len(self._ring)
+        self._read_count += k
+        return self._ring[start:start + k].reshape(-1)
+    
+    @staticmethod
+    def _log_wake_error(future):
+        """Report an exception raised by the on_wake callback."""
+        if not future.cancelled() and future.exception():
+            print(f"[WakeWord] Wake callback error: {future.exception()}")
     
     def _detection_loop(self):
         """Main detection loop running in thread."""
         try:
-            import sounddevice as sd
-            
-            # Audio parameters
-            sample_rate = 16000
-            chunk_size = 1280  # ~80ms at 16kHz
+            if not _HAS_SD:
+                print("[WakeWord] sounddevice not available, can't open microphone")
+                return
             
             print("[WakeWord] Starting microphone stream...")
             
+            self._write_count = self._read_count = 0
+            
             with sd.InputStream(
-                samplerate=sample_rate,
+                samplerate=self.SAMPLE_RATE,
                 channels=1,
                 dtype=np.int16,
-                blocksize=chunk_size,
+                blocksize=self.CHUNK_SIZE,
                 callback=self._audio_callback
             ):
                 print(f"[WakeWord] Listening for '{self.wake_word}'...")
                 
+                xruns_reported = self._xruns
                 while self._running:
+                    if not self._data_ready.wait(timeout=0.5):
+                        continue
+                    self._data_ready.clear()
+                    
+                    if self._xruns != xruns_reported:
+                        print(f"[Audio] {self._xruns - xruns_reported} stream over/underflow(s)")
+                        xruns_reported = self._xruns
+                    
                     try:
-                        # Get audio chunk from queue
-                        audio_chunk = self._audio_queue.get(timeout=0.5)
-                        
-                        # Process with wake word model
-                        prediction = self._model.predict(audio_chunk.flatten())
-                        
-                        # Check for wake word activation
-                        for model_name, score in prediction.items():
-                            if score > self.sensitivity:
-                                print(f"[WakeWord] Detected '{model_name}' with score {score:.2f}")
+                        while (audio := self._next_batch()) is not None:
+                            # Process several chunks per call, OWW scores every
+                            # 80ms frame and reports the highest
+                            prediction = self._model.predict(audio)
+                            
+                            # Check for wake word activation
+                            for model_name, score in prediction.items():
+                                if score > self.sensitivity:
+                                    # The score stays high for several frames of one utterance
+                                    now = time.monotonic()
+                                    if now - self._last_wake < self.COOLDOWN:
+                                        break
+                                    self._last_wake = now
+                                    self._model.reset()
+                                    
+                                    print(f"[WakeWord] Detected '{model_name}' with score {score:.2f}")
+                                    
+                                    if self.on_wake and self._loop:
+                                        # Hand the callback to the main event loop
+                                        future = asyncio.run_coroutine_threadsafe(self.on_wake(), self._loop)
+                                        future.add_done_callback(self._log_wake_error)
+                                    break
                                 
-                                if self.on_wake:
-                                    # Call the async callback
-                                    asyncio.run(self.on_wake())
-                                
-                    except queue.Empty:
-                        continue
                     except Exception as e:
                         print(f"[WakeWord] Processing error: {e}")
                         
@@ -112,6 +226,12 @@ class WakeWordDetector:
             print("[WakeWord] Failed to load model, not starting")
             return
         
+        try:
+            self._loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._loop = None
+            print("[WakeWord] start() called outside an event loop, on_wake won't be called")
+        
         self._running = True
         self._thread = threading.Thread(target=self._detection_loop, daemon=True)
         self._thread.start()
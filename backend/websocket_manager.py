@@ -1,11 +1,18 @@
 """
 Neon Pi - WebSocket Manager
 Handles real-time communication with the frontend.
+
+Everything here runs on the server's event loop, which is uvloop when it's
+installed (see main()), so broadcasts to many clients stay cheap.
 """
 from fastapi import WebSocket
-from typing import Dict, Set, Any
-import json
+from typing import Dict, Set, Any, Optional
 import asyncio
+import msgpack
+
+
+# Partial transcripts are sent at most this often (seconds)
+TRANSCRIPT_FLUSH_INTERVAL = 0.05
 
 
 class ConnectionManager:
@@ -14,6 +21,8 @@ class ConnectionManager:
     def __init__(self):
         self.active_connections: Set[WebSocket] = set()
         self._lock = asyncio.Lock()
+        self._pending_transcript: Optional[Dict[str, Any]] = None
+        self._flush_task: Optional[asyncio.Task] = None
     
     async def connect(self, websocket: WebSocket):
         """Accept and register a new WebSocket connection."""
@@ -31,25 +40,31 @@ class ConnectionManager:
     async def send_personal(self, websocket: WebSocket, message: Dict[str, Any]):
         """Send a message to a specific client."""
         try:
-            await websocket.send_json(message)
+            await websocket.send_bytes(msgpack.packb(message, use_bin_type=True))
         except Exception as e:
             print(f"[WebSocket] Error sending to client: {e}")
             await self.disconnect(websocket)
     
     async def broadcast(self, message: Dict[str, Any]):
         """Broadcast a message to all connected clients."""
-        disconnected = set()
+        await self.broadcast_raw(msgpack.packb(message, use_bin_type=True))
+    
+    async def broadcast_raw(self, payload: bytes):
+        """Broadcast an already-serialized MessagePack message to all connected clients."""
+        # Only hold the lock to copy the set, so a slow client can't stall everyone
         async with self._lock:
-            for connection in self.active_connections:
-                try:
-                    await connection.send_json(message)
-                except Exception as e:
-                    print(f"[WebSocket] Broadcast error: {e}")
-                    disconnected.add(connection)
+            connections = list(self.active_connections)
+        
+        results = await asyncio.gather(
+            *(connection.send_bytes(payload) for connection in connections),
+            return_exceptions=True
+        )
         
         # Clean up disconnected clients
-        for conn in disconnected:
-            await self.disconnect(conn)
+        for conn, result in zip(connections, results):
+            if isinstance(result, Exception):
+                print(f"[WebSocket] Broadcast error: {result}")
+                await self.disconnect(conn)
     
     async def send_state_update(self, state: str, data: Dict[str, Any] = None):
         """Send a state update to all clients."""
@@ -61,12 +76,34 @@ class ConnectionManager:
         await self.broadcast(message)
     
     async def send_transcript(self, text: str, is_final: bool = False):
-        """Send transcription update."""
-        await self.broadcast({
+        """
+        Send transcription update.
+        
+        Partial transcripts are coalesced so only the latest one within each
+        flush interval is sent; final transcripts go out immediately.
+        """
+        message = {
             "type": "transcript",
             "text": text,
             "is_final": is_final
-        })
+        }
+        
+        if is_final:
+            # The final text supersedes any partial still waiting
+            self._pending_transcript = None
+            await self.broadcast(message)
+            return
+        
+        self._pending_transcript = message
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_transcript())
+    
+    async def _flush_transcript(self):
+        """Send the latest partial transcript after the flush interval."""
+        await asyncio.sleep(TRANSCRIPT_FLUSH_INTERVAL)
+        message, self._pending_transcript = self._pending_transcript, None
+        if message is not None:
+            await self.broadcast(message)
     
     async def send_response(self, text: str):
         """Send AI response text."""
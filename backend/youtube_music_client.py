@@ -6,6 +6,11 @@ import asyncio
 import os
 from typing import Optional, Dict, Any
 from pathlib import Path
+from cachetools import TTLCache
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 try:
     from ytmusicapi import YTMusic
@@ -14,17 +19,32 @@ except ImportError:
     YTMUSIC_AVAILABLE = False
     YTMusic = None
 
+# Typed errors only exist in ytmusicapi 1.8+
+try:
+    from ytmusicapi.exceptions import YTMusicError
+except ImportError:
+    class YTMusicError(Exception):
+        """Stand-in so except clauses work without ytmusicapi's exceptions module."""
+
 from .config import settings
 
 
 class YouTubeMusicClient:
     """YouTube Music client for music control."""
     
+    # Search results change slowly, song details hardly ever
+    SEARCH_CACHE_TTL = 600
+    SONG_CACHE_TTL = 3600
+    
     def __init__(self):
         self.ytmusic: Optional[YTMusic] = None
         self._authenticated = False
         self._current_video_id: Optional[str] = None
         self._auth_file = Path(settings.base_dir) / "credentials" / "ytmusic_auth.json"
+        self._search_cache: TTLCache = TTLCache(maxsize=512, ttl=self.SEARCH_CACHE_TTL)
+        self._song_cache: TTLCache = TTLCache(maxsize=128, ttl=self.SONG_CACHE_TTL)
+        self._playlist_cache: TTLCache = TTLCache(maxsize=64, ttl=self.SEARCH_CACHE_TTL)
+        self._session: Optional[requests.Session] = None
     
     def is_available(self) -> bool:
         """Check if ytmusicapi is installed."""
@@ -34,6 +54,10 @@ class YouTubeMusicClient:
         """Check if authenticated with YouTube Music."""
         return self._authenticated and self.ytmusic is not None
     
+    def _ensure_ready(self) -> bool:
+        """Check that a YTMusic client has been created by load_auth()."""
+        return self.ytmusic is not None
+    
     def load_auth(self) -> bool:
         """Try to load existing authentication."""
         if not YTMUSIC_AVAILABLE:
@@ -41,20 +65,35 @@ class YouTubeMusicClient:
             return False
         
         try:
+            session = self._get_session()
             if self._auth_file.exists():
-                self.ytmusic = YTMusic(str(self._auth_file))
+                self.ytmusic = YTMusic(str(self._auth_file), requests_session=session)
                 self._authenticated = True
                 print("[YTMusic] Loaded existing authentication")
                 return True
             else:
                 # Try unauthenticated mode (limited features)
-                self.ytmusic = YTMusic()
+                self.ytmusic = YTMusic(requests_session=session)
                 print("[YTMusic] Running in unauthenticated mode (limited features)")
                 return True
         except Exception as e:
             print(f"[YTMusic] Auth load error: {e}")
             return False
     
+    def _get_session(self) -> requests.Session:
+        """Get the pooled HTTP session shared by all YTMusic requests."""
+        if self._session is None:
+            # Lookups run concurrently in worker threads, so keep enough
+            # keep-alive connections to Google for all of them
+            adapter = HTTPAdapter(
+                pool_connections=16,
+                pool_maxsize=32,
+                max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=(502, 503, 504))
+            )
+            self._session = requests.Session()
+            self._session.mount("https://", adapter)
+        return self._session
+    
     def get_auth_instructions(self) -> str:
         """Get instructions for authenticating YouTube Music."""
         return """
@@ -80,16 +119,40 @@ Or run in unauthenticated mode (can search and get info, but can't control playb
             query: Search query
             filter_type: songs, videos, albums, artists, playlists
         """
-        if not self.ytmusic:
+        if not self._ensure_ready():
             return []
         
+        key = (query.strip().lower(), filter_type)
+        results = self._search_cache.get(key)
+        if results is not None:
+            return results
+        
         try:
-            results = self.ytmusic.search(query, filter=filter_type, limit=5)
+            # ytmusicapi is blocking, keep it off the event loop
+            results = await asyncio.to_thread(self.ytmusic.search, query, filter=filter_type, limit=5)
+            self._search_cache[key] = results
             return results
         except Exception as e:
             print(f"[YTMusic] Search error: {e}")
             return []
     
+    async def _get_song(self, video_id: str) -> Optional[Dict[str, Any]]:
+        """Get song details by video ID, cached."""
+        song = self._song_cache.get(video_id)
+        if song is None:
+            song = await asyncio.to_thread(self.ytmusic.get_song, video_id)
+            if song:
+                self._song_cache[video_id] = song
+        return song
+    
+    async def _get_playlist_details(self, playlist_id: str) -> Dict[str, Any]:
+        """Get the first tracks of a playlist by ID, cached."""
+        details = self._playlist_cache.get(playlist_id)
+        if details is None:
+            details = await asyncio.to_thread(self.ytmusic.get_playlist, playlist_id, limit=10)
+            self._playlist_cache[playlist_id] = details
+        return details
+    
     async def get_song_info(self, query: str) -> Optional[Dict[str, Any]]:
         """Get info about a song."""
         results = await self.search(query, "songs")
@@ -114,7 +177,7 @@ Or run in unauthenticated mode (can search and get info, but can't control playb
         Find a song and return playback info.
         Returns video ID and info for frontend to handle.
         """
-        if not self.ytmusic:
+        if not self._ensure_ready():
             return {"error": "YouTube Music not connected"}
         
         try:
@@ -137,7 +200,7 @@ Or run in unauthenticated mode (can search and get info, but can't control playb
     
     async def get_playlist(self, query: str) -> Dict[str, Any]:
         """Search for a playlist and return its info."""
-        if not self.ytmusic:
+        if not self._ensure_ready():
             return {"error": "YouTube Music not connected"}
         
         try:
@@ -147,7 +210,7 @@ Or run in unauthenticated mode (can search and get info, but can't control playb
                 playlist_id = playlist.get("browseId")
                 
                 # Get playlist details
-                details = self.ytmusic.get_playlist(playlist_id, limit=10)
+                details = await self._get_playlist_details(playlist_id)
                 
                 tracks = []
                 for track in details.get("tracks", [])[:5]:
@@ -173,9 +236,9 @@ Or run in unauthenticated mode (can search and get info, but can't control playb
         Note: YTMusic API doesn't support this directly.
         Returns last played info if available.
         """
-        if self._current_video_id:
+        if self._current_video_id and self._ensure_ready():
             try:
-                song = self.ytmusic.get_song(self._current_video_id)
+                song = await self._get_song(self._current_video_id)
                 if song:
                     details = song.get("videoDetails", {})
                     return {
@@ -187,8 +250,11 @@ Or run in unauthenticated mode (can search and get info, but can't control playb
                         "progress_ms": 0,
                         "source": "youtube_music"
                     }
-            except:
-                pass
+            except (YTMusicError, requests.RequestException) as e:
+                print(f"[YTMusic] Now playing error: {e}")
+            except Exception as e:
+                # Older ytmusicapi raises plain exceptions, and malformed details can't be parsed
+                print(f"[YTMusic] Now playing error: {e}")
         return None
 
 
@@ -2,6 +2,7 @@
  * Neon Pi - Main Application JavaScript
  * Handles WebSocket connection, UI state, and user interactions.
  */
+import { decode } from './msgpack.js';
 
 // ============================================
 // State Management
@@ -71,6 +72,7 @@ function connectWebSocket() {
     console.log('[WS] Connecting to:', wsUrl);
 
     ws = new WebSocket(wsUrl);
+    ws.binaryType = 'arraybuffer';
 
     ws.onopen = () => {
         console.log('[WS] Connected');
@@ -99,7 +101,8 @@ function connectWebSocket() {
 
     ws.onmessage = (event) => {
         try {
-            const message = JSON.parse(event.data);
+            // Server sends MessagePack as binary frames
+            const message = typeof event.data === 'string' ? JSON.parse(event.data) : decode(event.data);
             handleMessage(message);
         } catch (e) {
             console.error('[WS] Parse error:', e);
@@ -145,6 +148,10 @@ function handleMessage(message) {
             playAudio(message.data);
             break;
 
+        case 'audio_pcm':
+            playPcm(message.data, message.sample_rate);
+            break;
+
         case 'error':
             showError(message.message);
             break;
@@ -352,30 +359,81 @@ async function connectSpotify() {
 // ============================================
 // Audio Playback
 // ============================================
-function playAudio(hexData) {
+const audioQueue = [];
+let audioPlaying = false;
+
+function playAudio(bytes) {
     try {
-        // Convert hex string to Uint8Array
-        const bytes = new Uint8Array(hexData.match(/.{1,2}/g).map(byte => parseInt(byte, 16)));
-
-        // Create blob and URL
-        const blob = new Blob([bytes], { type: 'audio/mpeg' });
-        const url = URL.createObjectURL(blob);
-
-        // Play audio
-        elements.audioPlayer.src = url;
-        elements.audioPlayer.play()
-            .then(() => console.log('[Audio] Playing'))
-            .catch(e => console.error('[Audio] Play error:', e));
-
-        // Clean up URL after playback
-        elements.audioPlayer.onended = () => {
-            URL.revokeObjectURL(url);
-        };
+        // Responses arrive one sentence at a time, so queue them up
+        audioQueue.push(new Blob([bytes], { type: 'audio/mpeg' }));
+        if (!audioPlaying) {
+            playNextAudio();
+        }
     } catch (error) {
         console.error('[Audio] Playback error:', error);
     }
 }
 
+function playNextAudio() {
+    const blob = audioQueue.shift();
+    if (!blob) {
+        audioPlaying = false;
+        return;
+    }
+
+    audioPlaying = true;
+    const url = URL.createObjectURL(blob);
+
+    // Clean up URL and move on after playback
+    const next = () => {
+        URL.revokeObjectURL(url);
+        playNextAudio();
+    };
+    elements.audioPlayer.onended = next;
+
+    // Play audio
+    elements.audioPlayer.src = url;
+    elements.audioPlayer.play()
+        .then(() => console.log('[Audio] Playing'))
+        .catch(e => {
+            console.error('[Audio] Play error:', e);
+            next();
+        });
+}
+
+// Streamed speech arrives as raw 16-bit PCM frames, scheduled back to back
+let pcmContext = null;
+let pcmNextTime = 0;
+
+function playPcm(bytes, sampleRate) {
+    try {
+        if (!pcmContext) {
+            pcmContext = new AudioContext();
+        }
+        if (pcmContext.state === 'suspended') {
+            pcmContext.resume();
+        }
+
+        // Copy so the samples start on an aligned offset
+        const samples = new Int16Array(bytes.slice().buffer);
+        const buffer = pcmContext.createBuffer(1, samples.length, sampleRate);
+        const channel = buffer.getChannelData(0);
+        for (let i = 0; i < samples.length; i++) {
+            channel[i] = samples[i] / 32768;
+        }
+
+        const source = pcmContext.createBufferSource();
+        source.buffer = buffer;
+        source.connect(pcmContext.destination);
+
+        const startAt = Math.max(pcmContext.currentTime, pcmNextTime);
+        source.start(startAt);
+        pcmNextTime = startAt + buffer.duration;
+    } catch (error) {
+        console.error('[Audio] PCM playback error:', error);
+    }
+}
+
 // ============================================
 // UI Updates
 // ============================================
@@ -135,8 +135,8 @@ if [ "$IS_RASPBERRY_PI" = true ]; then
     echo -e "${YELLOW}⚠ tflite-runtime not available, wake word may not work${NC}"
 fi
 
-# Install openwakeword and onnxruntime
-pip install onnxruntime openwakeword || echo -e "${YELLOW}⚠ openwakeword install failed${NC}"
+# Install openwakeword and onnxruntime (onnx is needed to quantize the model)
+pip install onnxruntime onnx openwakeword || echo -e "${YELLOW}⚠ openwakeword install failed${NC}"
 
 echo -e "${GREEN}✓ Python packages installed${NC}"
 
@@ -157,9 +157,20 @@ except Exception as e:
     print(f"⚠ Wake word model download: {e}")
 
 try:
-    from faster_whisper import WhisperModel
-    print("Downloading Whisper model (base)...")
-    model = WhisperModel("base", device="cpu", compute_type="int8")
+    from backend.wake_word import quantize_model
+    print("Quantizing wake word model to INT8...")
+    quantize_model("hey_jarvis")
+    print("✓ Wake word model quantized")
+except Exception as e:
+    print(f"⚠ Wake word quantization (FP32 model will be used): {e}")
+
+try:
+    # Same model the server loads (WHISPER_MODEL plus the English-only suffix)
+    from backend.speech_to_text import stt_engine
+    print(f"Downloading Whisper model ({stt_engine.model_size})...")
+    stt_engine._load_model()
+    if stt_engine._model is None:
+        raise RuntimeError("see the [STT] error above")
     print("✓ Whisper model downloaded")
 except Exception as e:
     print(f"⚠ Whisper model download: {e}")